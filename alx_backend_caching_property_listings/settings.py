@@ -42,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "properties.middleware.RequestProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -142,6 +143,70 @@ CACHES = {
     }
 }
 
+# Adaptive TTLs for property caches (see properties/adaptive_ttl.py)
+# Each namespace's TTL is chosen within MIN/MAX seconds from its observed
+# read and write rates, averaged over WINDOW seconds in shared cache counters.
+ADAPTIVE_CACHE_TTL = {
+    "WINDOW": 600,
+    "BUCKET": 60,
+    "READ_SAMPLE_RATE": 0.05,
+    "HOT_READS_PER_MINUTE": 60,
+    "DEFAULT": {"MIN": 60, "MAX": 3600},
+    "NAMESPACES": {
+        "all_properties": {"MIN": 300, "MAX": 86400},  # 5 minutes to 1 day
+        "property_list_page": {"MIN": 60, "MAX": 3600},  # 1 minute to 1 hour
+        "property_detail": {"MIN": 60, "MAX": 3600},  # 1 minute to 1 hour
+    },
+}
+
 # Session engine configuration
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "default"
+
+# Per-request profiling (see properties/middleware.py)
+# Emits a Server-Timing header on every response, logs a sampled share of
+# request profiles, and checks SQL query budgets per view name.
+PROPERTIES_PROFILING = {
+    "LOG_SAMPLE_RATE": 0.1,
+    "QUERY_BUDGETS": {
+        "properties:property_list": 1,
+        "properties:property_list_no_page_cache": 1,
+        "properties:property_search": 1,
+        "properties:property_detail": 1,
+        "properties:most_viewed": 1,
+        "properties:cache_status": 1,
+        "properties:cache_metrics": 1,  # Staff user lookup
+    },
+    "QUERY_BUDGET_ACTION": "raise" if DEBUG else "log",
+}
+
+# Hot-key and big-key tracking (see properties/keystats.py)
+# A sampled share of cache reads feeds an in-process count-min sketch whose
+# top keys are published to Redis; memory per key prefix is sampled with
+# SCAN + MEMORY USAGE at most once per MEMORY_SCAN_INTERVAL seconds.
+PROPERTIES_KEY_STATS = {
+    "SAMPLE_RATE": 0.05,
+    "TOP_K": 20,
+    "PUBLISH_INTERVAL": 30,
+    "MEMORY_SCAN_INTERVAL": 300,
+    "MEMORY_SCAN_KEYS": 1000,
+}
+
+# Cache metrics sampler (see properties/metrics_sampler.py)
+# Polls the needed Redis INFO sections every INTERVAL seconds into a ring
+# buffer of CAPACITY samples; cache-metrics/ is served from memory.
+PROPERTIES_METRICS_SAMPLER = {
+    "INTERVAL": 10,
+    "CAPACITY": 360,  # 1 hour of history
+    "WINDOWS": (60, 300, 900),
+}
+
+# Write-behind property view counters (see properties/view_counters.py)
+# Views are buffered in process, flushed to Redis in one pipeline, and
+# applied to Property.view_count by the flush_view_counts command.
+PROPERTIES_VIEW_COUNTERS = {
+    "FLUSH_EVERY": 100,
+    "FLUSH_INTERVAL": 5,
+    "DB_BATCH_SIZE": 1000,
+    "SEARCH_RESULTS_COUNTED": 10,
+}
@@ -0,0 +1,41 @@
+"""
+Test settings for alx_backend_caching_property_listings project.
+
+Runs the test suite offline: SQLite instead of PostgreSQL and the local-memory
+cache instead of Redis. Used automatically by ``python manage.py test``.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "KEY_PREFIX": "property_listings",
+        "TIMEOUT": 300,
+    }
+}
+
+PROPERTIES_PROFILING = {
+    **PROPERTIES_PROFILING,  # noqa: F405
+    "LOG_SAMPLE_RATE": 0,
+    "QUERY_BUDGET_ACTION": "raise",
+}
+
+PROPERTIES_METRICS_SAMPLER = {
+    **PROPERTIES_METRICS_SAMPLER,  # noqa: F405
+    "BACKGROUND": False,
+}
+
+# Tests flush view counters explicitly
+PROPERTIES_VIEW_COUNTERS = {
+    **PROPERTIES_VIEW_COUNTERS,  # noqa: F405
+    "FLUSH_EVERY": 10**9,
+    "FLUSH_INTERVAL": 10**9,
+}
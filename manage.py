@@ -6,6 +6,12 @@ import sys
 
 def main():
     """Run administrative tasks."""
+    if sys.argv[1:2] == ["test"]:
+        # Tests run offline against SQLite and the local-memory cache
+        os.environ.setdefault(
+            "DJANGO_SETTINGS_MODULE",
+            "alx_backend_caching_property_listings.test_settings",
+        )
     os.environ.setdefault(
         "DJANGO_SETTINGS_MODULE", "alx_backend_caching_property_listings.settings"
     )
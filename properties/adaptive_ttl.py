@@ -0,0 +1,203 @@
+import math
+import random
+import time
+
+from django.core.cache import cache
+from django.middleware.cache import CacheMiddleware
+from django.utils.cache import get_cache_key, get_max_age, patch_cache_control
+from django.utils.decorators import decorator_from_middleware_with_args
+
+from .cache_tags import register_tags
+from .conf import get_app_settings
+
+DEFAULT_ADAPTIVE_CACHE_TTL = {
+    # Seconds over which read and write rates are averaged
+    'WINDOW': 600,
+    # Width of the shared counter buckets the window is made of
+    'BUCKET': 60,
+    # Share of reads counted; each counted read adds 1 / READ_SAMPLE_RATE,
+    # so most cache hits don't write to the cache
+    'READ_SAMPLE_RATE': 0.05,
+    # Read rate at which an entry gets half of its write-based TTL range;
+    # hotter entries approach the full range, rarely read ones the minimum
+    'HOT_READS_PER_MINUTE': 60,
+    'DEFAULT': {'MIN': 60, 'MAX': 3600},
+    'NAMESPACES': {},
+}
+
+# Namespaces seen by this process, reported alongside the configured ones
+_namespaces = set()
+
+
+def _bucket_key(namespace, kind, bucket):
+    return f'ttl_rates:{namespace}:{kind}:{bucket}'
+
+
+def _record(namespace, kind, count=1):
+    """
+    Add events to the current time bucket of a shared counter, so every
+    worker sees reads and writes made by any process.
+    """
+    config = get_app_settings('ADAPTIVE_CACHE_TTL', DEFAULT_ADAPTIVE_CACHE_TTL)
+    bucket = int(time.time() // config['BUCKET'])
+    key = _bucket_key(namespace, kind, bucket)
+    try:
+        cache.incr(key, count)
+    except ValueError:
+        # First event in this bucket; add() loses to a concurrent creator
+        if not cache.add(key, count, config['WINDOW'] + config['BUCKET']):
+            cache.incr(key, count)
+
+
+def record_read(namespace):
+    """
+    Record a cache read for a namespace, subject to sampling.
+    """
+    _namespaces.add(namespace)
+    sample_rate = get_app_settings('ADAPTIVE_CACHE_TTL', DEFAULT_ADAPTIVE_CACHE_TTL)['READ_SAMPLE_RATE']
+    if random.random() < sample_rate:
+        _record(namespace, 'reads', round(1 / sample_rate))
+
+
+def record_write(*namespaces):
+    """
+    Record a write to the data behind one or more namespaces.
+    """
+    for namespace in namespaces:
+        _namespaces.add(namespace)
+        _record(namespace, 'writes')
+
+
+def get_rates(namespace):
+    """
+    Get a namespace's read and write rates over the last WINDOW seconds,
+    summed from the shared per-bucket counters.
+
+    Returns:
+        tuple: (reads_per_second, writes_per_second)
+    """
+    config = get_app_settings('ADAPTIVE_CACHE_TTL', DEFAULT_ADAPTIVE_CACHE_TTL)
+    now = time.time()
+    current = int(now // config['BUCKET'])
+    first = current - math.ceil(config['WINDOW'] / config['BUCKET'])
+    keys = {
+        kind: [_bucket_key(namespace, kind, bucket) for bucket in range(first, current + 1)]
+        for kind in ('reads', 'writes')
+    }
+    counts = cache.get_many(keys['reads'] + keys['writes'])
+    span = now - first * config['BUCKET']
+    return tuple(
+        sum(counts.get(key, 0) for key in keys[kind]) / span
+        for kind in ('reads', 'writes')
+    )
+
+
+def get_ttl_bounds(namespace):
+    """
+    Get the (min, max) TTL bounds configured for a namespace.
+    """
+    config = get_app_settings('ADAPTIVE_CACHE_TTL', DEFAULT_ADAPTIVE_CACHE_TTL)
+    bounds = config['NAMESPACES'].get(namespace, config['DEFAULT'])
+    return bounds['MIN'], bounds['MAX']
+
+
+def get_adaptive_ttl(namespace, rates=None):
+    """
+    Pick a TTL for a namespace from its observed read and write rates.
+
+    The TTL starts from the mean time between writes (the maximum if there
+    are none), so rarely changing data is kept longer. Reads then place it
+    between the minimum and that value: hot entries stay close to it and
+    rarely read ones fall towards the minimum, so they don't hold memory.
+
+    Args:
+        namespace: Cache namespace, e.g. 'all_properties'
+        rates: (reads, writes) per second, if already read with get_rates()
+
+    Returns:
+        int: TTL in seconds
+    """
+    min_ttl, max_ttl = get_ttl_bounds(namespace)
+    read_rate, write_rate = rates or get_rates(namespace)
+
+    ttl = max_ttl
+    if write_rate > 0:
+        ttl = max(min_ttl, min(ttl, 1 / write_rate))
+
+    hot_read_rate = get_app_settings('ADAPTIVE_CACHE_TTL', DEFAULT_ADAPTIVE_CACHE_TTL)['HOT_READS_PER_MINUTE'] / 60
+    heat = read_rate / (read_rate + hot_read_rate)
+    return int(min_ttl + (ttl - min_ttl) * heat)
+
+
+def get_adaptive_ttl_stats():
+    """
+    Get the observed rates and chosen TTL for every configured or tracked
+    namespace.
+
+    Returns:
+        dict: Per-namespace rates (per minute), TTL and bounds
+    """
+    namespaces = set(get_app_settings('ADAPTIVE_CACHE_TTL', DEFAULT_ADAPTIVE_CACHE_TTL)['NAMESPACES']) | _namespaces
+
+    stats = {}
+    for namespace in sorted(namespaces):
+        rates = get_rates(namespace)
+        min_ttl, max_ttl = get_ttl_bounds(namespace)
+        stats[namespace] = {
+            'reads_per_minute': round(rates[0] * 60, 3),
+            'writes_per_minute': round(rates[1] * 60, 3),
+            'ttl_seconds': get_adaptive_ttl(namespace, rates),
+            'min_ttl_seconds': min_ttl,
+            'max_ttl_seconds': max_ttl,
+        }
+    return stats
+
+
+class AdaptiveCacheMiddleware(CacheMiddleware):
+    """
+    Per-view page cache whose timeout follows get_adaptive_ttl().
+
+    Reads are recorded for the namespace on every request, and stored pages
+    are registered under the given cache tags so they are invalidated along
+    with the data they were rendered from.
+    """
+
+    def __init__(self, get_response, namespace, tags=(), **kwargs):
+        super().__init__(get_response, **kwargs)
+        self.namespace = namespace
+        self.tags = tuple(tags)
+
+    def process_request(self, request):
+        record_read(self.namespace)
+        return super().process_request(request)
+
+    def process_response(self, request, response):
+        should_update = self._should_update_cache(request, response)
+        if should_update and get_max_age(response) is None:
+            timeout = get_adaptive_ttl(self.namespace)
+            patch_cache_control(response, max_age=timeout)
+        response = super().process_response(request, response)
+
+        if should_update and self.tags and response.status_code == 200:
+            cache_key = get_cache_key(request, self.key_prefix, request.method, cache=self.cache)
+            if cache_key is not None:
+                register_tags(cache_key, self.tags, get_max_age(response))
+        return response
+
+
+def adaptive_cache_page(namespace, tags=(), *, cache=None, key_prefix=None):
+    """
+    Like cache_page(), but with an adaptive timeout and tag registration.
+
+    Args:
+        namespace: Namespace whose rates drive the timeout
+        tags: Cache tags the stored pages belong to
+        cache: Cache alias to use (defaults to CACHE_MIDDLEWARE_ALIAS)
+        key_prefix: Cache key prefix for the stored pages
+    """
+    return decorator_from_middleware_with_args(AdaptiveCacheMiddleware)(
+        namespace=namespace,
+        tags=tags,
+        cache_alias=cache,
+        key_prefix=key_prefix,
+    )
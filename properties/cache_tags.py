@@ -0,0 +1,227 @@
+import logging
+import math
+import random
+import time
+
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+# Share of tag registrations that also prune expired members from the tag set
+TAG_PRUNE_SAMPLE_RATE = 0.01
+
+# Add a member to each tag set (KEYS) and keep the set's expiry at least as
+# long as the member's timeout (ARGV[2], negative for none). A set without
+# an expiry holds a member that never expires, so it is left without one.
+REGISTER_TAGS_SCRIPT = """
+local timeout = tonumber(ARGV[2])
+for _, key in ipairs(KEYS) do
+    local ttl = redis.call('TTL', key)
+    redis.call('SADD', key, ARGV[1])
+    if timeout < 0 then
+        redis.call('PERSIST', key)
+    elseif ttl == -2 or (ttl ~= -1 and ttl < timeout) then
+        redis.call('EXPIRE', key, timeout)
+    end
+end
+"""
+
+
+def get_redis_client():
+    """
+    Get the raw Redis client behind the default cache.
+
+    Returns:
+        Redis client, or None when the default cache is not Redis-backed
+        (e.g. locmem in tests)
+    """
+    try:
+        return get_redis_connection("default")
+    except NotImplementedError:
+        return None
+
+
+def _tag_key(tag):
+    return f'tag:{tag}'
+
+
+def set_with_tags(key, value, timeout, tags):
+    """
+    Store a value in the cache and register it under the given tags.
+
+    Args:
+        key: Cache key
+        value: Value to cache
+        timeout: Timeout in seconds (None to never expire)
+        tags: Iterable of tags such as 'catalog', 'property:42' or
+              'location:Nairobi'
+    """
+    cache.set(key, value, timeout)
+    register_tags(key, tags, timeout)
+
+
+def set_many_with_tags(mapping, timeout, tags):
+    """
+    Store several values in the cache and register them all under the given tags.
+
+    Args:
+        mapping: Dict of cache keys to values
+        timeout: Timeout in seconds (None to never expire)
+        tags: Iterable of tags
+    """
+    cache.set_many(mapping, timeout)
+    tags = list(tags)
+    for key in mapping:
+        register_tags(key, tags, timeout)
+
+
+def register_tags(key, tags, timeout):
+    """
+    Record that a cache key belongs to the given tags.
+
+    With Redis each tag is a set of full cache keys, updated by a Lua script
+    that keeps the set's expiry at least as long as its longest-lived member
+    (none if a member never expires), so it disappears once all of its keys
+    have expired.
+
+    Args:
+        key: Cache key, as passed to the cache API
+        tags: Iterable of tags
+        timeout: Timeout of the cached key in seconds (None to never expire)
+    """
+    tags = list(tags)
+    if not tags:
+        return
+
+    redis_client = get_redis_client()
+    if redis_client is None:
+        _register_tags_in_cache(key, tags, timeout)
+        return
+
+    register = redis_client.register_script(REGISTER_TAGS_SCRIPT)
+    register(
+        keys=[cache.make_key(_tag_key(tag)) for tag in tags],
+        args=[cache.make_key(key), -1 if timeout is None else timeout],
+    )
+
+    if random.random() < TAG_PRUNE_SAMPLE_RATE:
+        for tag in tags:
+            prune_tag(tag)
+
+
+def invalidate_tags(*tags):
+    """
+    Delete every cache key registered under any of the given tags.
+
+    Tag sets are read and cleared atomically, then all member keys are
+    removed with a single pipelined delete.
+
+    Args:
+        *tags: Tags to invalidate
+
+    Returns:
+        int: Number of cache keys deleted
+    """
+    if not tags:
+        return 0
+
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return _invalidate_tags_in_cache(tags)
+
+    pipe = redis_client.pipeline(transaction=True)
+    for tag in tags:
+        tag_key = cache.make_key(_tag_key(tag))
+        pipe.smembers(tag_key)
+        pipe.delete(tag_key)
+    results = pipe.execute()
+
+    keys = set()
+    for members in results[::2]:
+        keys.update(members)
+    if not keys:
+        return 0
+
+    deleted = redis_client.delete(*keys)
+    logger.info(f"Invalidated {deleted} cache keys for tags: {', '.join(tags)}")
+    return deleted
+
+
+def prune_tag(tag):
+    """
+    Remove members whose cache keys have already expired from a tag set.
+
+    Args:
+        tag: Tag to prune
+
+    Returns:
+        int: Number of members removed
+    """
+    redis_client = get_redis_client()
+    if redis_client is None:
+        # Expired entries are dropped whenever the cache-backed set is updated
+        return 0
+
+    tag_key = cache.make_key(_tag_key(tag))
+    members = list(redis_client.smembers(tag_key))
+    if not members:
+        return 0
+
+    pipe = redis_client.pipeline(transaction=False)
+    for member in members:
+        pipe.exists(member)
+    expired = [member for member, exists in zip(members, pipe.execute()) if not exists]
+    if expired:
+        redis_client.srem(tag_key, *expired)
+    return len(expired)
+
+
+def update_cached_dict(key, update):
+    """
+    Read, modify and write back a dict stored in the cache. Used by the
+    fallbacks that stand in for Redis sets, hashes and sorted sets on other
+    cache backends. Not atomic, which is acceptable for the local and test
+    backends they serve.
+
+    Args:
+        key: Cache key of the dict
+        update: Callable given the current dict (empty if missing) that
+                returns the new dict and its timeout
+
+    Returns:
+        dict: The stored dict
+    """
+    value, timeout = update(cache.get(key) or {})
+    cache.set(key, value, timeout)
+    return value
+
+
+def _register_tags_in_cache(key, tags, timeout):
+    """
+    Fallback for non-Redis caches: keep each tag as a {key: expires_at} dict.
+    """
+    now = time.time()
+    expires_at = None if timeout is None else now + timeout
+
+    def add_member(members):
+        members = {
+            member: member_expires_at
+            for member, member_expires_at in members.items()
+            if member_expires_at is None or member_expires_at > now
+        }
+        members[key] = expires_at
+        if None in members.values():
+            return members, None
+        return members, math.ceil(max(members.values()) - now)
+
+    for tag in tags:
+        update_cached_dict(_tag_key(tag), add_member)
+
+
+def _invalidate_tags_in_cache(tags):
+    keys = set()
+    for tag in tags:
+        keys.update(cache.get(_tag_key(tag)) or {})
+    cache.delete_many(list(keys) + [_tag_key(tag) for tag in tags])
+    return len(keys)
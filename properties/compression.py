@@ -0,0 +1,166 @@
+import gzip
+import json
+from functools import wraps
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .adaptive_ttl import get_adaptive_ttl
+from .cache_tags import set_many_with_tags
+from .middleware import profile_section
+from .utils import CATALOG_TAG, get_catalog_generation
+
+try:
+    import brotli
+except ImportError:  # Optional; gzip is always available
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 9
+
+
+def _compress(encoding, body):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        # Fixed mtime so every build of a catalog version is byte-identical
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+
+def get_supported_encodings():
+    """
+    Get the content codings bodies are precompressed with, preferred first.
+
+    Returns:
+        tuple: e.g. ('br', 'gzip', 'identity')
+    """
+    if brotli is not None:
+        return ('br', 'gzip', 'identity')
+    return ('gzip', 'identity')
+
+
+def parse_accept_encoding(header):
+    """
+    Parse an Accept-Encoding header into a {coding: qvalue} dict.
+    """
+    qvalues = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        qvalue = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                qvalue = float(params[2:])
+            except ValueError:
+                qvalue = 0.0
+        qvalues[coding] = qvalue
+    return qvalues
+
+
+def choose_encoding(header):
+    """
+    Pick the best supported encoding the client's Accept-Encoding allows.
+
+    The highest qvalue wins; ties go to the smaller encoding. Identity is
+    acceptable unless explicitly refused, and is also the fallback when
+    nothing else is acceptable.
+
+    Args:
+        header: Accept-Encoding header value ('' if absent)
+
+    Returns:
+        str: 'br', 'gzip' or 'identity'
+    """
+    qvalues = parse_accept_encoding(header)
+    wildcard = qvalues.get('*')
+    best, best_qvalue = 'identity', 0.0
+    for encoding in get_supported_encodings():
+        if encoding in qvalues:
+            qvalue = qvalues[encoding]
+        elif wildcard is not None:
+            qvalue = wildcard
+        else:
+            qvalue = 1.0 if encoding == 'identity' else 0.0
+        if qvalue > best_qvalue:
+            best, best_qvalue = encoding, qvalue
+    return best
+
+
+def negotiate_encoding(view_func):
+    """
+    Decorator replacing the request's Accept-Encoding with the encoding
+    choose_encoding() picks for it.
+
+    Apply it above a page cache decorator: the page cache varies on the raw
+    header, so without this every distinct client header ('gzip, deflate',
+    'gzip, deflate, br', ...) would store another copy of the page.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        request.META['HTTP_ACCEPT_ENCODING'] = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+def get_precompressed_body(name, encoding, build_data):
+    """
+    Get a serialized response body in the given encoding.
+
+    Bodies are cached per catalog generation. On a miss the JSON is built
+    once and stored in every supported encoding, so later requests for any
+    encoding only read from the cache.
+
+    Args:
+        name: Name of the response, used in the cache key
+        encoding: One of get_supported_encodings()
+        build_data: Callable returning the JSON-serializable response data
+
+    Returns:
+        bytes: The encoded body
+    """
+    generation = get_catalog_generation()
+    cache_key = f'{name}_body:{generation}:{encoding}'
+    body = cache.get(cache_key)
+    if body is not None:
+        return body
+
+    data = build_data()
+    with profile_section('serialize'):
+        identity = json.dumps(data, cls=DjangoJSONEncoder).encode()
+        variants = {
+            f'{name}_body:{generation}:{variant}': _compress(variant, identity)
+            for variant in get_supported_encodings()
+        }
+    set_many_with_tags(variants, get_adaptive_ttl('property_list_page'), tags=[CATALOG_TAG])
+    return variants[cache_key]
+
+
+def precompressed_json_response(request, name, build_data):
+    """
+    Build a JSON response from a precompressed cached body, negotiated on
+    the request's Accept-Encoding.
+
+    Args:
+        request: The current request
+        name: Name of the response, used in the cache key
+        build_data: Callable returning the JSON-serializable response data
+
+    Returns:
+        HttpResponse: Response with Content-Encoding and Vary set
+    """
+    encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+    body = get_precompressed_body(name, encoding, build_data)
+
+    response = HttpResponse(body, content_type='application/json')
+    if encoding != 'identity':
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,17 @@
+from django.conf import settings
+
+
+def get_app_settings(name, defaults):
+    """
+    Get one of the app's settings dicts, merged over its defaults.
+
+    Args:
+        name: Setting name, e.g. 'ADAPTIVE_CACHE_TTL'
+        defaults: Dict of default values
+
+    Returns:
+        dict: The defaults updated with the project's values
+    """
+    config = dict(defaults)
+    config.update(getattr(settings, name, {}))
+    return config
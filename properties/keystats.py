@@ -0,0 +1,391 @@
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+
+from .cache_tags import get_redis_client
+from .conf import get_app_settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROPERTIES_KEY_STATS = {
+    # Share of cache accesses recorded in the sketch
+    'SAMPLE_RATE': 0.05,
+    # Number of hot keys tracked and reported
+    'TOP_K': 20,
+    'SKETCH_WIDTH': 2048,
+    'SKETCH_DEPTH': 4,
+    # Seconds between publishing local hot-key counts to Redis
+    'PUBLISH_INTERVAL': 30,
+    # Seconds a per-prefix memory scan is reused before scanning again
+    'MEMORY_SCAN_INTERVAL': 300,
+    # Maximum keys sampled with MEMORY USAGE per scan
+    'MEMORY_SCAN_KEYS': 1000,
+}
+
+# Shared sorted set of hot-key counts published by every process
+HOT_KEYS_KEY = 'keystats:hot_keys'
+HOT_KEYS_TTL = 24 * 60 * 60
+
+# Key groups owned by this app; only these keys are tracked or reported by name
+APP_KEY_GROUPS = frozenset({
+    'all_properties',
+    'property_detail',
+    'property_list_body',
+    'property_list_no_page_cache_body',
+    'properties_catalog_generation',
+    'property_views',
+    'tag',
+    'ttl_rates',
+    'keystats',
+    'views.decorators.cache.cache_page',
+    'views.decorators.cache.cache_header',
+})
+
+# Other users of the shared cache whose keys embed secrets, e.g. session ids
+SESSION_KEY_GROUPS = ('django.contrib.sessions.cached_db', 'django.contrib.sessions.cache')
+OTHER_KEY_GROUP = 'other'
+
+
+class CountMinSketch:
+    """
+    Approximate per-key counters in fixed memory.
+
+    Estimates never undercount; they overcount by at most a small fraction
+    of the total count, controlled by the sketch width.
+    """
+
+    def __init__(self, width, depth):
+        self.width = width
+        self.depth = depth
+        self.rows = [[0] * width for _ in range(depth)]
+
+    def _indexes(self, key):
+        for row in range(self.depth):
+            yield row, hash((row, key)) % self.width
+
+    def add(self, key, count=1):
+        estimate = None
+        for row, index in self._indexes(key):
+            self.rows[row][index] += count
+            value = self.rows[row][index]
+            estimate = value if estimate is None else min(estimate, value)
+        return estimate
+
+    def estimate(self, key):
+        return min(self.rows[row][index] for row, index in self._indexes(key))
+
+
+class HotKeyTracker:
+    """
+    Sampled top-k of cache keys by access frequency, in this process.
+    """
+
+    def __init__(self, sample_rate, top_k, width, depth):
+        self.sample_rate = sample_rate
+        self.top_k = top_k
+        self.sketch = CountMinSketch(width, depth)
+        self.top = {}
+        self.published = defaultdict(int)
+        self.published_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def record(self, key):
+        """
+        Record one access to a key, subject to sampling.
+
+        Returns:
+            bool: True if the access was sampled
+        """
+        if random.random() >= self.sample_rate:
+            return False
+
+        with self.lock:
+            estimate = self.sketch.add(key)
+            if key in self.top or len(self.top) < self.top_k:
+                self.top[key] = estimate
+            else:
+                coldest = min(self.top, key=self.top.get)
+                if estimate > self.top[coldest]:
+                    del self.top[coldest]
+                    self.top[key] = estimate
+        return True
+
+    def hot_keys(self):
+        """
+        Get the tracked keys with access counts scaled up by the sample rate.
+
+        Returns:
+            list: (key, estimated_accesses) pairs, hottest first
+        """
+        with self.lock:
+            top = sorted(self.top.items(), key=lambda item: item[1], reverse=True)
+        return [(key, round(count / self.sample_rate)) for key, count in top]
+
+    def unpublished_counts(self):
+        """
+        Take the growth in each hot key's estimate since the last publish.
+        """
+        with self.lock:
+            deltas = {}
+            for key, estimate in self.top.items():
+                delta = estimate - self.published[key]
+                if delta > 0:
+                    deltas[key] = delta / self.sample_rate
+                    self.published[key] = estimate
+            # Forget keys that dropped out of the top-k
+            self.published = defaultdict(int, {key: self.published[key] for key in self.top})
+            self.published_at = time.monotonic()
+        return deltas
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+_memory_scan = None
+_memory_scan_lock = threading.Lock()
+
+
+def get_hot_key_tracker():
+    """
+    Get this process's hot key tracker, creating it on first use.
+    """
+    global _tracker
+
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                config = get_app_settings('PROPERTIES_KEY_STATS', DEFAULT_PROPERTIES_KEY_STATS)
+                _tracker = HotKeyTracker(
+                    config['SAMPLE_RATE'],
+                    config['TOP_K'],
+                    config['SKETCH_WIDTH'],
+                    config['SKETCH_DEPTH'],
+                )
+    return _tracker
+
+
+def record_key_access(key):
+    """
+    Record a sampled cache key access and periodically publish hot-key counts.
+    Keys outside the app's own groups (e.g. sessions) are not recorded.
+
+    Args:
+        key: Cache key, as passed to the cache API
+    """
+    if not is_app_key(key):
+        return
+
+    tracker = get_hot_key_tracker()
+    if not tracker.record(key):
+        return
+
+    interval = get_app_settings('PROPERTIES_KEY_STATS', DEFAULT_PROPERTIES_KEY_STATS)['PUBLISH_INTERVAL']
+    if time.monotonic() - tracker.published_at >= interval:
+        publish_hot_keys(tracker)
+
+
+def publish_hot_keys(tracker=None):
+    """
+    Add this process's hot-key counts to the shared Redis sorted set, so
+    every worker's accesses show up in the reports.
+    """
+    tracker = tracker or get_hot_key_tracker()
+    deltas = tracker.unpublished_counts()
+    redis_client = get_redis_client()
+    if redis_client is None or not deltas:
+        return
+
+    hot_keys_key = cache.make_key(HOT_KEYS_KEY)
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for key, delta in deltas.items():
+            pipe.zincrby(hot_keys_key, delta, key)
+        # Keep only the hottest keys
+        pipe.zremrangebyrank(hot_keys_key, 0, -(tracker.top_k * 10) - 1)
+        pipe.expire(hot_keys_key, HOT_KEYS_TTL)
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Error publishing hot cache keys: {str(e)}")
+
+
+def get_shared_hot_keys(limit):
+    """
+    Get the hottest keys across all processes from Redis.
+
+    Returns:
+        list: (key, estimated_accesses) pairs, or None without Redis
+    """
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return None
+    entries = redis_client.zrevrange(cache.make_key(HOT_KEYS_KEY), 0, limit - 1, withscores=True)
+    return [(key.decode(), round(score)) for key, score in entries if is_app_key(key.decode())]
+
+
+def key_group(key):
+    """
+    Group a cache key by prefix, e.g.
+    'property_listings:1:tag:catalog' -> 'tag' and
+    'property_listings:1:views.decorators.cache.cache_page.<hash>...' ->
+    'views.decorators.cache.cache_page'.
+
+    Keys that don't belong to the app collapse into a fixed group (the
+    session backend's prefix, or 'other'), so key names such as session ids
+    never show up as groups.
+    """
+    prefix = cache.make_key('')
+    if key.startswith(prefix):
+        key = key[len(prefix):]
+    if key.startswith('views.decorators.cache.'):
+        group = '.'.join(key.split('.')[:4])
+    else:
+        group = key.split(':', 1)[0]
+    if group in APP_KEY_GROUPS:
+        return group
+    for session_group in SESSION_KEY_GROUPS:
+        if key.startswith(session_group):
+            return session_group
+    return OTHER_KEY_GROUP
+
+
+def is_app_key(key):
+    """
+    Check whether a cache key belongs to one of the app's own groups.
+    """
+    return key_group(key) in APP_KEY_GROUPS
+
+
+def scan_memory_by_prefix(max_keys=None):
+    """
+    Sample cache keys with SCAN and sum MEMORY USAGE per key prefix.
+
+    When the scan stops at max_keys before covering the keyspace, totals are
+    extrapolated from the sample using DBSIZE.
+
+    Returns:
+        dict: Per-prefix key counts and bytes, plus scan details
+    """
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return {'error': 'Memory usage is only available with the Redis cache'}
+
+    max_keys = max_keys or get_app_settings('PROPERTIES_KEY_STATS', DEFAULT_PROPERTIES_KEY_STATS)['MEMORY_SCAN_KEYS']
+    keys = []
+    for key in redis_client.scan_iter(match=f"{cache.make_key('')}*", count=500):
+        keys.append(key)
+        if len(keys) >= max_keys:
+            break
+
+    pipe = redis_client.pipeline(transaction=False)
+    for key in keys:
+        pipe.memory_usage(key)
+    usages = pipe.execute()
+
+    groups = defaultdict(lambda: {'sampled_keys': 0, 'sampled_bytes': 0, 'largest_key': None, 'largest_bytes': 0})
+    for key, usage in zip(keys, usages):
+        if usage is None:
+            # Expired between SCAN and MEMORY USAGE
+            continue
+        key = key.decode()
+        group = groups[key_group(key)]
+        group['sampled_keys'] += 1
+        group['sampled_bytes'] += usage
+        if usage > group['largest_bytes']:
+            # Only name keys the app owns
+            group['largest_key'] = key if is_app_key(key) else None
+            group['largest_bytes'] = usage
+
+    total_keys = redis_client.dbsize()
+    complete = len(keys) < max_keys
+    scale = 1 if complete or not keys else total_keys / len(keys)
+    for group in groups.values():
+        group['estimated_bytes'] = round(group['sampled_bytes'] * scale)
+
+    return {
+        'prefixes': dict(sorted(groups.items(), key=lambda item: item[1]['sampled_bytes'], reverse=True)),
+        'sampled_keys': len(keys),
+        'database_keys': total_keys,
+        'complete_scan': complete,
+    }
+
+
+def get_memory_by_prefix():
+    """
+    Get per-prefix memory usage, rescanning at most once per
+    MEMORY_SCAN_INTERVAL seconds.
+    """
+    global _memory_scan
+
+    interval = get_app_settings('PROPERTIES_KEY_STATS', DEFAULT_PROPERTIES_KEY_STATS)['MEMORY_SCAN_INTERVAL']
+    scan = _memory_scan
+    if scan is not None and time.monotonic() - scan[0] < interval:
+        return scan[1]
+
+    with _memory_scan_lock:
+        scan = _memory_scan
+        if scan is not None and time.monotonic() - scan[0] < interval:
+            return scan[1]
+        try:
+            result = scan_memory_by_prefix()
+        except Exception as e:
+            result = {'error': f"Error scanning cache memory usage: {str(e)}"}
+            logger.error(result['error'])
+        result['scanned_at'] = time.time()
+        _memory_scan = (time.monotonic(), result)
+        return result
+
+
+def get_key_stats():
+    """
+    Report hot keys (by sampled access frequency) and memory per key prefix.
+
+    Hot keys come from the shared Redis ranking when available, otherwise
+    from this process only. Each hot key is annotated with its MEMORY USAGE
+    so keys that dominate bandwidth (hot and big) stand out.
+
+    Returns:
+        dict: Hot keys, memory by prefix and sampling details
+    """
+    config = get_app_settings('PROPERTIES_KEY_STATS', DEFAULT_PROPERTIES_KEY_STATS)
+    tracker = get_hot_key_tracker()
+    publish_hot_keys(tracker)
+
+    source = 'redis'
+    try:
+        hot_keys = get_shared_hot_keys(config['TOP_K'])
+    except Exception as e:
+        logger.error(f"Error reading shared hot cache keys: {str(e)}")
+        hot_keys = None
+    if hot_keys is None:
+        source = 'process'
+        hot_keys = tracker.hot_keys()
+
+    sizes = [None] * len(hot_keys)
+    redis_client = get_redis_client()
+    if redis_client is not None and hot_keys:
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for key, _ in hot_keys:
+                pipe.memory_usage(cache.make_key(key))
+            sizes = pipe.execute()
+        except Exception as e:
+            logger.error(f"Error reading hot key sizes: {str(e)}")
+
+    return {
+        'hot_keys': [
+            {
+                'key': key,
+                'estimated_accesses': accesses,
+                'memory_bytes': size,
+                'estimated_bytes_served': accesses * size if size is not None else None,
+            }
+            for (key, accesses), size in zip(hot_keys, sizes)
+        ],
+        'hot_keys_source': source,
+        'sample_rate': config['SAMPLE_RATE'],
+        'memory_by_prefix': get_memory_by_prefix(),
+    }
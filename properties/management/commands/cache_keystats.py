@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from properties.keystats import get_key_stats, scan_memory_by_prefix
+
+
+class Command(BaseCommand):
+    help = 'Report hot cache keys and memory usage per key prefix'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-keys',
+            type=int,
+            default=None,
+            help='Maximum keys to sample with MEMORY USAGE (default: PROPERTIES_KEY_STATS setting)',
+        )
+
+    def handle(self, *args, **options):
+        stats = get_key_stats()
+        if options['max_keys']:
+            memory = scan_memory_by_prefix(options['max_keys'])
+        else:
+            memory = stats['memory_by_prefix']
+
+        self.stdout.write(self.style.SUCCESS(
+            f"=== Hot Cache Keys (source: {stats['hot_keys_source']}, "
+            f"sample rate: {stats['sample_rate']}) ==="
+        ))
+        if not stats['hot_keys']:
+            self.stdout.write("No key accesses recorded yet")
+        for entry in stats['hot_keys']:
+            size = entry['memory_bytes']
+            size_text = f"{size} bytes" if size is not None else "size unknown"
+            self.stdout.write(f"  {entry['estimated_accesses']:>10}  {entry['key']} ({size_text})")
+
+        self.stdout.write(self.style.SUCCESS("\n=== Memory Usage by Key Prefix ==="))
+        if 'error' in memory:
+            self.stdout.write(self.style.WARNING(memory['error']))
+            return
+
+        self.stdout.write(
+            f"Sampled {memory['sampled_keys']} of {memory['database_keys']} keys"
+            f"{'' if memory['complete_scan'] else ' (totals extrapolated)'}"
+        )
+        for prefix, group in memory['prefixes'].items():
+            self.stdout.write(
+                f"  {prefix}: {group['sampled_keys']} keys, "
+                f"~{group['estimated_bytes']} bytes, "
+                f"largest {group['largest_key']} ({group['largest_bytes']} bytes)"
+            )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from properties.view_counters import flush_view_counts_to_db
+import time
+
+
+class Command(BaseCommand):
+    help = 'Apply property view counts accumulated in Redis to the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Properties updated per bulk UPDATE (default: PROPERTIES_VIEW_COUNTERS setting)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=None,
+            help='Keep running and flush every INTERVAL seconds',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.perf_counter()
+            applied = flush_view_counts_to_db(options['batch_size'])
+            elapsed = time.perf_counter() - start
+            self.stdout.write(self.style.SUCCESS(
+                f"Applied {applied} property views in {elapsed:.2f}s"
+            ))
+
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,237 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from properties.models import Property
+from properties.signals import suspended_cache_invalidation
+from properties.utils import PROPERTY_DETAIL_TAG
+from properties.view_counters import clear_view_counts
+import io
+import random
+import time
+
+# Locations with a typical listing price; earlier entries are drawn more often
+LOCATIONS = [
+    ('Nairobi', 9000000),
+    ('Mombasa', 6000000),
+    ('Kisumu', 4000000),
+    ('Nakuru', 3500000),
+    ('Eldoret', 3250000),
+    ('Thika', 3000000),
+    ('Malindi', 4500000),
+    ('Kitale', 2250000),
+    ('Garissa', 1750000),
+    ('Kakamega', 2000000),
+    ('Nyeri', 2750000),
+    ('Machakos', 2500000),
+    ('Meru', 2400000),
+    ('Naivasha', 3750000),
+    ('Nanyuki', 3400000),
+    ('Kericho', 2100000),
+    ('Lamu', 5500000),
+    ('Kilifi', 4250000),
+    ('Embu', 2150000),
+    ('Voi', 1900000),
+]
+
+ADJECTIVES = [
+    'Spacious', 'Modern', 'Cozy', 'Renovated', 'Luxury', 'Sunny', 'Quiet',
+    'Charming', 'Elegant', 'Affordable', 'Furnished', 'Secure',
+]
+PROPERTY_TYPES = [
+    ('Studio', 0.4), ('Apartment', 0.8), ('Townhouse', 1.3), ('Bungalow', 1.5),
+    ('Maisonette', 1.6), ('Villa', 2.5), ('Penthouse', 3.0), ('Cottage', 1.1),
+]
+FEATURES = [
+    'a private garden', 'ample parking', 'a rooftop terrace', 'backup power',
+    'a borehole', 'a swimming pool', 'a gym', 'fibre internet',
+    'a servant quarter', 'an open-plan kitchen', 'ocean views', 'a balcony',
+]
+
+# Largest value DecimalField(max_digits=10, decimal_places=2) can hold
+MAX_PRICE = Decimal('99999999.99')
+
+# view_count has no database default, so raw loads must set it
+COLUMNS = ('title', 'description', 'price', 'location', 'created_at', 'view_count')
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic property listings for scale testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=100000,
+            help='Number of listings to generate (default: 100000)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed, so runs are reproducible (default: 42)',
+        )
+        parser.add_argument(
+            '--location-skew',
+            type=float,
+            default=1.1,
+            help='Zipf exponent for location popularity; 0 is uniform (default: 1.1)',
+        )
+        parser.add_argument(
+            '--price-skew',
+            type=float,
+            default=0.6,
+            help='Log-normal sigma for prices around each location\'s typical price (default: 0.6)',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='Spread created_at over this many days before now (default: 365)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Rows per COPY / INSERT batch (default: 10000)',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete existing properties before loading',
+        )
+
+    def handle(self, *args, **options):
+        count = options['count']
+        batch_size = options['batch_size']
+        if count < 0 or batch_size < 1 or options['days'] < 0:
+            raise CommandError('--count and --days must be >= 0 and --batch-size must be >= 1')
+
+        rng = random.Random(options['seed'])
+        weights = [1 / (rank + 1) ** options['location_skew'] for rank in range(len(LOCATIONS))]
+        use_copy = connection.vendor == 'postgresql'
+        method = 'COPY' if use_copy else 'executemany'
+        tags = {f'location:{name}' for name, _ in LOCATIONS}
+        if options['clear']:
+            # The raw DELETE sends no post_delete signals, so drop every
+            # detail entry and the existing rows' location tags on exit
+            tags.add(PROPERTY_DETAIL_TAG)
+            tags.update(
+                f'location:{location}'
+                for location in Property.objects.values_list('location', flat=True).distinct()
+            )
+        end = timezone.now()
+        start_at = end - timedelta(days=options['days'])
+
+        self.stdout.write(f"Seeding {count} properties using {method} (seed {options['seed']})...")
+        start = time.perf_counter()
+        loaded = 0
+
+        # Per-row signals would invalidate the cache millions of times;
+        # invalidate once after the load instead
+        with suspended_cache_invalidation(*tags):
+            if options['clear']:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'DELETE FROM {connection.ops.quote_name(Property._meta.db_table)}')
+                # Ids may be reused, so deleted rows must not keep their views
+                clear_view_counts()
+                self.stdout.write("Deleted existing properties")
+
+            while loaded < count:
+                rows = self.generate_rows(
+                    rng, min(batch_size, count - loaded), weights, options['price_skew'],
+                    start_at, end,
+                )
+                with transaction.atomic():
+                    if use_copy:
+                        self.copy_rows(rows)
+                    else:
+                        self.insert_rows(rows)
+                loaded += len(rows)
+
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"  {loaded}/{count} rows ({loaded / elapsed:,.0f} rows/s)")
+
+        elapsed = time.perf_counter() - start
+        rate = loaded / elapsed if elapsed > 0 else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {loaded} properties in {elapsed:.1f}s ({rate:,.0f} rows/s)"
+        ))
+
+    def generate_rows(self, rng, size, weights, price_skew, start_at, end):
+        """
+        Generate one batch of listing rows as tuples in COLUMNS order,
+        with created_at spread uniformly between start_at and end.
+        """
+        span = (end - start_at).total_seconds()
+        locations = rng.choices(LOCATIONS, weights=weights, k=size)
+        rows = []
+        for location, typical_price in locations:
+            property_type, type_factor = rng.choice(PROPERTY_TYPES)
+            bedrooms = rng.randint(1, 6)
+            features = rng.sample(FEATURES, 2)
+            price = Decimal(typical_price * type_factor * rng.lognormvariate(0, price_skew))
+            price = min(price.quantize(Decimal('0.01')), MAX_PRICE)
+            rows.append((
+                f"{rng.choice(ADJECTIVES)} {bedrooms}-Bedroom {property_type} in {location}",
+                f"{property_type} with {bedrooms} bedrooms, {features[0]} and {features[1]}.",
+                price,
+                location,
+                start_at + timedelta(seconds=rng.uniform(0, span)),
+                0,
+            ))
+        return rows
+
+    def insert_rows(self, rows):
+        """
+        Load rows with one executemany INSERT. Unlike bulk_create this skips
+        pre_save(), which would replace the generated created_at with now()
+        (auto_now_add).
+        """
+        table = connection.ops.quote_name(Property._meta.db_table)
+        columns = ', '.join(connection.ops.quote_name(column) for column in COLUMNS)
+        placeholders = ', '.join(['%s'] * len(COLUMNS))
+        price_field = Property._meta.get_field('price')
+        params = [
+            (
+                title,
+                description,
+                connection.ops.adapt_decimalfield_value(
+                    price, price_field.max_digits, price_field.decimal_places
+                ),
+                location,
+                connection.ops.adapt_datetimefield_value(created_at),
+                view_count,
+            )
+            for title, description, price, location, created_at, view_count in rows
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(f'INSERT INTO {table} ({columns}) VALUES ({placeholders})', params)
+
+    def copy_rows(self, rows):
+        """
+        Load rows with PostgreSQL COPY, using psycopg 3 or psycopg2.
+        """
+        table = connection.ops.quote_name(Property._meta.db_table)
+        columns = ', '.join(connection.ops.quote_name(column) for column in COLUMNS)
+        sql = f'COPY {table} ({columns}) FROM STDIN'
+
+        with connection.cursor() as cursor:
+            raw_cursor = cursor.cursor
+            if hasattr(raw_cursor, 'copy'):
+                # psycopg 3
+                with raw_cursor.copy(sql) as copy:
+                    for row in rows:
+                        copy.write_row(row)
+            else:
+                # psycopg2; generated text never contains tabs, newlines or backslashes
+                buffer = io.StringIO()
+                for row in rows:
+                    buffer.write('\t'.join(
+                        value.isoformat() if hasattr(value, 'isoformat') else str(value)
+                        for value in row
+                    ))
+                    buffer.write('\n')
+                buffer.seek(0)
+                raw_cursor.copy_expert(sql, buffer)
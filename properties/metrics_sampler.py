@@ -0,0 +1,217 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from .adaptive_ttl import get_adaptive_ttl_stats
+from .cache_tags import get_redis_client
+from .conf import get_app_settings
+from .keystats import get_key_stats
+from .utils import get_cache_efficiency, get_cache_status, read_redis_info, summarize_redis_info
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROPERTIES_METRICS_SAMPLER = {
+    # Seconds between Redis INFO polls
+    'INTERVAL': 10,
+    # Samples kept in the ring buffer (1 hour at the default interval)
+    'CAPACITY': 360,
+    # Windows, in seconds, for which hit-ratio deltas are reported
+    'WINDOWS': (60, 300, 900),
+    # Poll from a background thread; otherwise sample on demand at most
+    # once per INTERVAL
+    'BACKGROUND': True,
+}
+
+
+class CacheMetricsSampler:
+    """
+    Polls Redis INFO at a fixed interval into a ring buffer of samples, and
+    refreshes the application cache statistics alongside, so metrics
+    requests are served from memory instead of querying the cache.
+    """
+
+    def __init__(self, interval, capacity, background=True):
+        self.interval = interval
+        self.background = background
+        self.samples = deque(maxlen=capacity)
+        self.app_stats = None
+        self.lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def sample(self):
+        """
+        Take one sample and append it to the ring buffer, and refresh the
+        application cache statistics.
+
+        Returns:
+            dict: The sample; carries an 'error' key if Redis could not be read
+        """
+        sample = {'timestamp': time.time()}
+        try:
+            redis_client = get_redis_client()
+            if redis_client is None:
+                raise RuntimeError('The default cache is not Redis-backed')
+            sample.update(summarize_redis_info(read_redis_info(redis_client)))
+        except Exception as e:
+            sample['error'] = f"Error sampling Redis cache metrics: {str(e)}"
+            logger.error(sample['error'])
+
+        app_stats = {}
+        for name, collect in (
+            ('application_cache_status', get_cache_status),
+            ('adaptive_ttls', get_adaptive_ttl_stats),
+            ('key_stats', get_key_stats),
+        ):
+            try:
+                app_stats[name] = collect()
+            except Exception as e:
+                app_stats[name] = {'error': f"Error collecting {name}: {str(e)}"}
+                logger.error(app_stats[name]['error'])
+
+        with self.lock:
+            self.samples.append(sample)
+            self.app_stats = app_stats
+        return sample
+
+    def ensure_running(self):
+        """
+        Start the polling thread if it isn't running in this process.
+        Threads don't survive fork(), so a forked worker starts its own.
+        """
+        if not self.background:
+            return
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self.lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name='cache-metrics-sampler', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self.sample()
+            time.sleep(self.interval)
+
+    def latest(self):
+        """
+        Get the most recent sample, taking one if none is fresh enough.
+        """
+        with self.lock:
+            latest = self.samples[-1] if self.samples else None
+        if latest is None or (
+            not self.background and time.time() - latest['timestamp'] >= self.interval
+        ):
+            latest = self.sample()
+        return latest
+
+    def window(self, seconds, latest):
+        """
+        Compute hit/miss deltas between the latest sample and the oldest
+        sample within the window.
+
+        Returns:
+            dict: Hits, misses and hit ratio over the window, or None if
+                  there is not enough history
+        """
+        with self.lock:
+            samples = [sample for sample in self.samples if 'error' not in sample]
+        baseline = next(
+            (sample for sample in samples if latest['timestamp'] - sample['timestamp'] <= seconds),
+            None,
+        )
+        if baseline is None or baseline is latest or 'error' in latest:
+            return None
+
+        hits = latest['keyspace_hits'] - baseline['keyspace_hits']
+        misses = latest['keyspace_misses'] - baseline['keyspace_misses']
+        if hits < 0 or misses < 0:
+            # Counters were reset (CONFIG RESETSTAT or a restart)
+            return None
+        total = hits + misses
+        hit_ratio = hits / total * 100 if total > 0 else 0
+        return {
+            'seconds': round(latest['timestamp'] - baseline['timestamp']),
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio_percentage': round(hit_ratio, 2),
+            'cache_efficiency': get_cache_efficiency(hit_ratio) if total > 0 else 'Unknown',
+        }
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def start_cache_metrics_sampler():
+    """
+    Start the background sampler when a web worker loads its middleware,
+    so samples accumulate before the first metrics request. Management
+    commands never load middleware, so they don't poll.
+    """
+    if get_app_settings('PROPERTIES_METRICS_SAMPLER', DEFAULT_PROPERTIES_METRICS_SAMPLER)['BACKGROUND']:
+        get_cache_metrics_sampler()
+
+
+def get_cache_metrics_sampler():
+    """
+    Get the process-wide metrics sampler, starting it on first use.
+    """
+    global _sampler
+
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                config = get_app_settings('PROPERTIES_METRICS_SAMPLER', DEFAULT_PROPERTIES_METRICS_SAMPLER)
+                _sampler = CacheMetricsSampler(
+                    config['INTERVAL'], config['CAPACITY'], config['BACKGROUND']
+                )
+    _sampler.ensure_running()
+    return _sampler
+
+
+def get_sampled_cache_metrics():
+    """
+    Get the latest sampled Redis cache metrics with hit-ratio deltas per window.
+
+    Returns:
+        dict: Same fields as get_redis_cache_metrics(), plus 'sampled_at',
+              'sample_interval_seconds' and 'windows'
+    """
+    sampler = get_cache_metrics_sampler()
+    latest = sampler.latest()
+
+    metrics = dict(latest)
+    timestamp = metrics.pop('timestamp')
+    if 'error' in metrics:
+        metrics.setdefault('hit_ratio_percentage', 0)
+        metrics.setdefault('cache_efficiency', 'Unknown')
+    metrics['sampled_at'] = datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+    metrics['sample_interval_seconds'] = sampler.interval
+    metrics['windows'] = {
+        f'{seconds}s': sampler.window(seconds, latest)
+        for seconds in get_app_settings('PROPERTIES_METRICS_SAMPLER', DEFAULT_PROPERTIES_METRICS_SAMPLER)['WINDOWS']
+    }
+    return metrics
+
+
+def get_sampled_app_stats():
+    """
+    Get the application cache statistics collected with the latest sample.
+
+    Returns:
+        dict: 'application_cache_status' (utils.get_cache_status()),
+              'adaptive_ttls' (adaptive_ttl.get_adaptive_ttl_stats()) and
+              'key_stats' (keystats.get_key_stats())
+    """
+    sampler = get_cache_metrics_sampler()
+    sampler.latest()
+    with sampler.lock:
+        return sampler.app_stats
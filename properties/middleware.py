@@ -0,0 +1,202 @@
+import contextvars
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.core.cache import caches
+from django.db import connections
+
+from .conf import get_app_settings
+from .keystats import record_key_access
+from .metrics_sampler import start_cache_metrics_sampler
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROPERTIES_PROFILING = {
+    # Share of requests whose profile is written to the log
+    'LOG_SAMPLE_RATE': 0.1,
+    # Maximum SQL queries per view name, e.g. {'properties:property_list': 1}
+    'QUERY_BUDGETS': {},
+    # 'log' to log a warning when a budget is exceeded, 'raise' to fail
+    'QUERY_BUDGET_ACTION': 'log',
+    # Cache aliases whose calls are timed
+    'CACHE_ALIASES': ('default',),
+}
+
+# Cache methods that each hit the backend once
+PROFILED_CACHE_METHODS = (
+    'get', 'set', 'add', 'delete', 'touch', 'has_key', 'incr', 'decr',
+    'get_many', 'set_many', 'delete_many',
+)
+
+_current_profile = contextvars.ContextVar('properties_request_profile', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Raised when a view runs more SQL queries than its configured budget.
+    """
+
+
+class RequestProfile:
+    """
+    Call counts and cumulative durations (in seconds) for one request.
+    """
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.durations = defaultdict(float)
+
+    def add(self, section, duration):
+        self.counts[section] += 1
+        self.durations[section] += duration
+
+    def server_timing(self, total):
+        """
+        Format the profile as a Server-Timing header value.
+        """
+        metrics = []
+        for section, description in (('cache', 'calls'), ('db', 'queries'), ('serialize', None)):
+            if section not in self.counts:
+                continue
+            metric = f"{section};dur={self.durations[section] * 1000:.2f}"
+            if description:
+                metric += f';desc="{self.counts[section]} {description}"'
+            metrics.append(metric)
+        metrics.append(f"total;dur={total * 1000:.2f}")
+        return ', '.join(metrics)
+
+
+@contextmanager
+def profile_section(section):
+    """
+    Time a block of code into the current request's profile, if any.
+
+    Args:
+        section: Section name, e.g. 'serialize'
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(section, time.perf_counter() - start)
+
+
+def _timed_cache_method(name, method, profile):
+    def wrapper(*args, **kwargs):
+        if args and name == 'get':
+            record_key_access(args[0])
+        elif args and name == 'get_many':
+            for key in args[0]:
+                record_key_access(key)
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            profile.add('cache', time.perf_counter() - start)
+    return wrapper
+
+
+@contextmanager
+def _profile_cache_calls(cache, profile):
+    """
+    Shadow the cache's methods with timed wrappers for the duration of the
+    block. Cache instances are thread-local, so this doesn't affect other
+    requests.
+    """
+    shadowed = {name: cache.__dict__[name] for name in PROFILED_CACHE_METHODS if name in cache.__dict__}
+    for name in PROFILED_CACHE_METHODS:
+        setattr(cache, name, _timed_cache_method(name, getattr(cache, name), profile))
+    try:
+        yield
+    finally:
+        for name in PROFILED_CACHE_METHODS:
+            if name in shadowed:
+                setattr(cache, name, shadowed[name])
+            else:
+                delattr(cache, name)
+
+
+def _query_timer(profile):
+    def wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            profile.add('db', time.perf_counter() - start)
+    return wrapper
+
+
+class RequestProfilingMiddleware:
+    """
+    Profile cache calls, SQL queries and serialization for each request.
+    Cache reads are also fed to the sampled hot-key tracker.
+
+    Adds a Server-Timing header to every response, logs a sampled JSON
+    profile, and enforces the per-view query budgets from
+    PROPERTIES_PROFILING['QUERY_BUDGETS'].
+
+    Also starts the cache metrics sampler: middleware is only loaded by the
+    WSGI/ASGI handler, once per worker.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        start_cache_metrics_sampler()
+
+    def __call__(self, request):
+        config = get_app_settings('PROPERTIES_PROFILING', DEFAULT_PROPERTIES_PROFILING)
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in config['CACHE_ALIASES']:
+                    stack.enter_context(_profile_cache_calls(caches[alias], profile))
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_query_timer(profile)))
+                response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        total = time.perf_counter() - start
+
+        response['Server-Timing'] = profile.server_timing(total)
+
+        view_name = request.resolver_match.view_name if request.resolver_match else None
+        if random.random() < config['LOG_SAMPLE_RATE']:
+            logger.info(json.dumps({
+                'event': 'request_profile',
+                'path': request.path,
+                'view': view_name,
+                'status': response.status_code,
+                'total_ms': round(total * 1000, 2),
+                'cache_calls': profile.counts['cache'],
+                'cache_ms': round(profile.durations['cache'] * 1000, 2),
+                'db_queries': profile.counts['db'],
+                'db_ms': round(profile.durations['db'] * 1000, 2),
+                'serialize_ms': round(profile.durations['serialize'] * 1000, 2),
+            }))
+
+        self.check_query_budget(view_name, profile.counts['db'], config)
+        return response
+
+    def check_query_budget(self, view_name, query_count, config):
+        """
+        Log or raise when a view exceeds its configured query budget.
+        """
+        budget = config['QUERY_BUDGETS'].get(view_name)
+        if budget is None or query_count <= budget:
+            return
+
+        message = f"Query budget exceeded for {view_name}: {query_count} queries (budget {budget})"
+        if config['QUERY_BUDGET_ACTION'] == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("properties", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="property",
+            name="view_count",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -7,6 +7,16 @@ class Property(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     location = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Maintained in bulk by flush_view_counts; live counts are kept in Redis
+    view_count = models.PositiveBigIntegerField(default=0)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored location, so an update that moves the property
+        # can also invalidate the old location's cache tag
+        instance._loaded_location = instance.__dict__.get('location')
+        return instance
 
     def __str__(self):
         return self.title
@@ -1,13 +1,40 @@
+import contextvars
+from contextlib import contextmanager
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.core.cache import cache
 from .models import Property
+from .cache_tags import invalidate_tags
+from .adaptive_ttl import record_write
+from .view_counters import forget_property_views
+from .utils import CATALOG_NAMESPACES, bump_catalog_generation, get_property_tags, invalidate_properties_cache
+
+_invalidation_suspended = contextvars.ContextVar('properties_invalidation_suspended', default=False)
+
+
+@contextmanager
+def suspended_cache_invalidation(*tags):
+    """
+    Skip per-row cache invalidation inside the block, e.g. during bulk loads,
+    then invalidate the catalog (and any extra tags) once on exit.
+    
+    Args:
+        *tags: Additional tags to invalidate on exit, e.g. 'location:Nairobi'
+    """
+    token = _invalidation_suspended.set(True)
+    try:
+        yield
+    finally:
+        _invalidation_suspended.reset(token)
+        invalidate_tags(*tags)
+        invalidate_properties_cache()
+        record_write(*CATALOG_NAMESPACES)
 
 
 @receiver(post_save, sender=Property)
 def invalidate_properties_cache_on_save(sender, instance, created, **kwargs):
     """
-    Signal handler to invalidate the properties cache when a Property is created or updated.
+    Signal handler to invalidate cached entries tagged with the catalog, the
+    property or its location when a Property is created or updated.
     
     Args:
         sender: The model class (Property)
@@ -15,7 +42,12 @@ def invalidate_properties_cache_on_save(sender, instance, created, **kwargs):
         created: Boolean indicating if this is a new instance
         **kwargs: Additional keyword arguments
     """
-    cache.delete('all_properties')
+    if _invalidation_suspended.get():
+        return
+    invalidate_tags(*get_property_tags(instance, getattr(instance, '_loaded_location', None)))
+    instance._loaded_location = instance.location
+    bump_catalog_generation()
+    record_write(*CATALOG_NAMESPACES)
     if created:
         print(f"Cache invalidated after creating property: {instance.title}")
     else:
@@ -25,12 +57,19 @@ def invalidate_properties_cache_on_save(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=Property)
 def invalidate_properties_cache_on_delete(sender, instance, **kwargs):
     """
-    Signal handler to invalidate the properties cache when a Property is deleted.
+    Signal handler to invalidate cached entries tagged with the catalog, the
+    property or its location when a Property is deleted, and to drop its
+    view counts.
     
     Args:
         sender: The model class (Property)
         instance: The actual instance being deleted
         **kwargs: Additional keyword arguments
     """
-    cache.delete('all_properties')
+    forget_property_views(instance.pk)
+    if _invalidation_suspended.get():
+        return
+    invalidate_tags(*get_property_tags(instance))
+    bump_catalog_generation()
+    record_write(*CATALOG_NAMESPACES)
     print(f"Cache invalidated after deleting property: {instance.title}")
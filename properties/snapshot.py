@@ -0,0 +1,191 @@
+import logging
+import threading
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+
+import numpy as np
+
+from .utils import get_all_properties, get_catalog_generation
+
+logger = logging.getLogger(__name__)
+
+# Sortable fields mapped to the snapshot column holding them
+SORT_FIELDS = {
+    'id': 'ids',
+    'price': 'prices',
+    'created_at': 'created_at',
+}
+
+# Worker-local snapshot; replaced wholesale, never mutated in place
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+class PropertySnapshot:
+    """
+    Compact columnar copy of the property catalog.
+
+    Each column is a NumPy array aligned by row, so filters, sorts and top-k
+    queries run as vectorized operations instead of ORM queries or Python
+    loops over Property instances. Locations are dictionary-encoded: the
+    ``location_codes`` column holds indexes into ``locations``.
+    """
+
+    def __init__(self, generation, ids, prices, created_at, location_codes, locations):
+        self.generation = generation
+        self.ids = ids
+        self.prices = prices
+        self.created_at = created_at
+        self.location_codes = location_codes
+        self.locations = locations
+        self._location_index = {name: code for code, name in enumerate(locations)}
+
+    @classmethod
+    def from_properties(cls, properties, generation):
+        """
+        Build a snapshot from an iterable of Property objects.
+
+        Args:
+            properties: Property instances, as returned by get_all_properties()
+            generation: Catalog generation the properties belong to
+
+        Returns:
+            PropertySnapshot: The columnar snapshot
+        """
+        properties = list(properties)
+        count = len(properties)
+        ids = np.empty(count, dtype=np.int64)
+        # Prices are stored in cents so comparisons stay exact
+        prices = np.empty(count, dtype=np.int64)
+        created_at = np.empty(count, dtype='datetime64[us]')
+        location_codes = np.empty(count, dtype=np.int32)
+        location_index = {}
+
+        for row, property_obj in enumerate(properties):
+            ids[row] = property_obj.id
+            prices[row] = int(property_obj.price * 100)
+            # Stored as naive UTC microseconds
+            created_at[row] = round(property_obj.created_at.timestamp() * 1_000_000)
+            location_codes[row] = location_index.setdefault(property_obj.location, len(location_index))
+
+        return cls(generation, ids, prices, created_at, location_codes, list(location_index))
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        """
+        Approximate memory held by the column arrays, in bytes.
+        """
+        return self.ids.nbytes + self.prices.nbytes + self.created_at.nbytes + self.location_codes.nbytes
+
+    def mask(self, location=None, min_price=None, max_price=None):
+        """
+        Build a boolean row mask for the given filters.
+
+        Args:
+            location: Exact location to match
+            min_price: Inclusive lower price bound (Decimal, int or str)
+            max_price: Inclusive upper price bound (Decimal, int or str)
+
+        Returns:
+            numpy.ndarray: Boolean mask aligned with the columns
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if location is not None:
+            code = self._location_index.get(location)
+            if code is None:
+                return np.zeros(len(self), dtype=bool)
+            mask &= self.location_codes == code
+        if min_price is not None:
+            mask &= self.prices >= _to_cents(min_price, ROUND_CEILING)
+        if max_price is not None:
+            mask &= self.prices <= _to_cents(max_price, ROUND_FLOOR)
+        return mask
+
+    def query(self, location=None, min_price=None, max_price=None,
+              sort='id', descending=False, limit=None):
+        """
+        Filter, sort and optionally truncate the catalog.
+
+        When ``limit`` is set only the top ``limit`` rows are fully sorted,
+        using a partial partition instead of a full sort.
+
+        Returns:
+            numpy.ndarray: Row indexes into the columns, in result order
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unsupported sort field: {sort}")
+
+        rows = np.flatnonzero(self.mask(location, min_price, max_price))
+        keys = getattr(self, SORT_FIELDS[sort])[rows]
+        if descending:
+            keys = -keys.view(np.int64)
+        else:
+            keys = keys.view(np.int64)
+
+        if limit is not None and limit < len(rows):
+            if limit <= 0:
+                return rows[:0]
+            top = np.argpartition(keys, limit - 1)[:limit]
+            return rows[top[np.argsort(keys[top], kind='stable')]]
+        return rows[np.argsort(keys, kind='stable')]
+
+    def rows(self, indexes):
+        """
+        Materialize snapshot rows as JSON-serializable dicts.
+
+        Args:
+            indexes: Row indexes, as returned by query()
+
+        Returns:
+            list: One dict per row with id, price, location and created_at
+        """
+        return [
+            {
+                'id': int(self.ids[i]),
+                'price': f"{self.prices[i] / 100:.2f}",
+                'location': self.locations[self.location_codes[i]],
+                'created_at': f"{np.datetime_as_string(self.created_at[i])}+00:00",
+            }
+            for i in indexes
+        ]
+
+
+def _to_cents(value, rounding):
+    # Round bounds inwards: a lower bound of 10.005 must exclude 10.00
+    return int((Decimal(str(value)) * 100).to_integral_value(rounding=rounding))
+
+
+def get_property_snapshot():
+    """
+    Get the worker-local property snapshot, rebuilding it when stale.
+
+    The snapshot is loaded through get_all_properties(), so it shares the
+    low-level cache with the listing views. A new snapshot is built whenever
+    the catalog generation changes and swapped in with a single assignment,
+    so concurrent readers always see either the old or the new snapshot.
+
+    Returns:
+        PropertySnapshot: Snapshot for the current catalog generation
+    """
+    global _snapshot
+
+    generation = get_catalog_generation()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.generation == generation:
+        return snapshot
+
+    with _snapshot_lock:
+        # Another thread may have rebuilt it while we waited
+        snapshot = _snapshot
+        if snapshot is not None and snapshot.generation == generation:
+            return snapshot
+
+        snapshot = PropertySnapshot.from_properties(get_all_properties(), generation)
+        _snapshot = snapshot
+        logger.info(f"Property snapshot rebuilt: "
+                    f"generation {generation}, "
+                    f"{len(snapshot)} rows, "
+                    f"{snapshot.nbytes} bytes")
+        return snapshot
@@ -1,3 +1,798 @@
-from django.test import TestCase
+import gzip
+import json
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+try:
+    import fakeredis
+    import lupa  # noqa: F401 (fakeredis needs it to run Lua scripts)
+except ImportError:  # Redis-backed tests are skipped without them
+    fakeredis = None
+
+from . import adaptive_ttl, metrics_sampler, snapshot, view_counters
+from .cache_tags import invalidate_tags, register_tags, set_with_tags
+from .compression import choose_encoding, get_supported_encodings
+from .keystats import (
+    CountMinSketch,
+    HotKeyTracker,
+    get_shared_hot_keys,
+    key_group,
+    publish_hot_keys,
+    record_key_access,
+)
+from .metrics_sampler import CacheMetricsSampler, get_cache_metrics_sampler
+from .middleware import QueryBudgetExceeded
+from .models import Property
+from .utils import (
+    ALL_PROPERTIES_META_KEY,
+    CATALOG_GENERATION_KEY,
+    get_all_properties,
+    get_catalog_generation,
+    invalidate_properties_cache,
+)
+
+# Run with: python manage.py test
+# (uses alx_backend_caching_property_listings.test_settings: SQLite + locmem)
+
+PAGE_HEADER_KEY_PREFIX = 'views.decorators.cache.cache_header.'
+PAGE_KEY_PREFIX = 'views.decorators.cache.cache_page.'
+
+
+def _cache_key_name(key):
+    """
+    Map a cache key to a stable name; page cache keys embed URL hashes and
+    precompressed body keys embed the catalog generation.
+    """
+    if key.startswith(PAGE_HEADER_KEY_PREFIX):
+        return 'page_header'
+    if key.startswith(PAGE_KEY_PREFIX):
+        return 'page'
+    if '_body:' in key:
+        name, _, rest = key.partition('_body:')
+        return f"{name}_body:{rest.rsplit(':', 1)[1]}"
+    return key
+
+
+class CacheBehaviorTestCase(TestCase):
+    """
+    Base test case that starts each test with an empty cache and snapshot
+    and can record the sequence of cache hits and misses.
+    """
+
+    def setUp(self):
+        cache.clear()
+        snapshot._snapshot = None
+        view_counters._buffer.take()
+        self.nairobi = Property.objects.create(
+            title='Garden Apartment',
+            description='Two bedrooms near the park',
+            price=Decimal('120000.00'),
+            location='Nairobi',
+        )
+        self.mombasa = Property.objects.create(
+            title='Beach House',
+            description='Steps from the ocean',
+            price=Decimal('350000.00'),
+            location='Mombasa',
+        )
+
+    @contextmanager
+    def assertCacheGets(self, expected):
+        """
+        Assert the exact sequence of (key, 'hit' | 'miss') cache reads made
+        inside the block. Tag registry and TTL rate bookkeeping reads are
+        ignored.
+        """
+        calls = []
+        original_get = LocMemCache.get
+
+        def recording_get(cache_self, key, default=None, version=None):
+            value = original_get(cache_self, key, default, version)
+            if not key.startswith(('tag:', 'ttl_rates:')):
+                calls.append((_cache_key_name(key), 'miss' if value is default else 'hit'))
+            return value
+
+        with mock.patch.object(LocMemCache, 'get', recording_get):
+            yield
+        self.assertEqual(calls, expected)
+
+    def get_json(self, url_name, **params):
+        response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+
+class PropertyListTests(CacheBehaviorTestCase):
+    url_name = 'properties:property_list'
+
+    def test_cold_request_fills_page_and_queryset_cache(self):
+        with self.assertNumQueries(1), self.assertCacheGets([
+            ('page_header', 'miss'),
+            (CATALOG_GENERATION_KEY, 'hit'),
+            ('property_list_body:identity', 'miss'),
+            ('all_properties', 'miss'),
+            ('page_header', 'hit'),
+        ]):
+            data = self.get_json(self.url_name)
+        self.assertEqual(data['count'], 2)
+
+    def test_warm_request_is_served_from_page_cache(self):
+        self.get_json(self.url_name)
+        with self.assertNumQueries(0), self.assertCacheGets([
+            ('page_header', 'hit'),
+            ('page', 'hit'),
+        ]):
+            data = self.get_json(self.url_name)
+        self.assertEqual(data['count'], 2)
+
+    def test_write_invalidates_page_cache(self):
+        self.get_json(self.url_name)
+        Property.objects.create(
+            title='Loft', description='City views', price=Decimal('90000.00'), location='Nairobi'
+        )
+        with self.assertNumQueries(1), self.assertCacheGets([
+            ('page_header', 'hit'),
+            ('page', 'miss'),
+            (CATALOG_GENERATION_KEY, 'hit'),
+            ('property_list_body:identity', 'miss'),
+            ('all_properties', 'miss'),
+            ('page_header', 'hit'),
+        ]):
+            data = self.get_json(self.url_name)
+        self.assertEqual(data['count'], 3)
+
+
+class PropertyListNoPageCacheTests(CacheBehaviorTestCase):
+    url_name = 'properties:property_list_no_page_cache'
+
+    def test_cold_warm_and_invalidated(self):
+        body = 'property_list_no_page_cache_body:identity'
+        with self.assertNumQueries(1), self.assertCacheGets([
+            (CATALOG_GENERATION_KEY, 'hit'),
+            (body, 'miss'),
+            ('all_properties', 'miss'),
+        ]):
+            self.assertEqual(self.get_json(self.url_name)['count'], 2)
+
+        # Served from the precompressed body cache without loading the catalog
+        with self.assertNumQueries(0), self.assertCacheGets([
+            (CATALOG_GENERATION_KEY, 'hit'),
+            (body, 'hit'),
+        ]):
+            self.assertEqual(self.get_json(self.url_name)['count'], 2)
+
+        self.mombasa.delete()
+        with self.assertNumQueries(1), self.assertCacheGets([
+            (CATALOG_GENERATION_KEY, 'hit'),
+            (body, 'miss'),
+            ('all_properties', 'miss'),
+        ]):
+            self.assertEqual(self.get_json(self.url_name)['count'], 1)
+
+    def test_gzip_variant_is_built_once_per_catalog_version(self):
+        self.get_json(self.url_name)
+
+        with self.assertNumQueries(0), self.assertCacheGets([
+            (CATALOG_GENERATION_KEY, 'hit'),
+            ('property_list_no_page_cache_body:gzip', 'hit'),
+        ]):
+            response = self.client.get(reverse(self.url_name), HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(response.content))['count'], 2)
+
+
+class PropertySearchTests(CacheBehaviorTestCase):
+    url_name = 'properties:property_search'
+
+    def test_cold_warm_and_invalidated(self):
+        with self.assertNumQueries(1), self.assertCacheGets([
+            (CATALOG_GENERATION_KEY, 'hit'),
+            ('all_properties', 'miss'),
+        ]):
+            data = self.get_json(self.url_name, sort='-price')
+        self.assertEqual([row['id'] for row in data['properties']], [self.mombasa.id, self.nairobi.id])
+
+        # The worker-local snapshot answers without reading the catalog
+        with self.assertNumQueries(0), self.assertCacheGets([(CATALOG_GENERATION_KEY, 'hit')]):
+            data = self.get_json(self.url_name, location='Nairobi')
+        self.assertEqual([row['id'] for row in data['properties']], [self.nairobi.id])
+
+        self.nairobi.price = Decimal('500000.00')
+        self.nairobi.save()
+        with self.assertNumQueries(1), self.assertCacheGets([
+            (CATALOG_GENERATION_KEY, 'hit'),
+            ('all_properties', 'miss'),
+        ]):
+            data = self.get_json(self.url_name, sort='-price', limit=1)
+        self.assertEqual(data['properties'][0]['id'], self.nairobi.id)
+        self.assertEqual(data['properties'][0]['price'], '500000.00')
+
+    def test_price_filters(self):
+        data = self.get_json(self.url_name, min_price='100000', max_price='200000')
+        self.assertEqual([row['id'] for row in data['properties']], [self.nairobi.id])
+
+    def test_fractional_cent_price_bounds(self):
+        data = self.get_json(self.url_name, min_price='120000.005')
+        self.assertEqual([row['id'] for row in data['properties']], [self.mombasa.id])
+        data = self.get_json(self.url_name, max_price='349999.995')
+        self.assertEqual([row['id'] for row in data['properties']], [self.nairobi.id])
+        data = self.get_json(self.url_name, min_price='-0.005', max_price='120000.001')
+        self.assertEqual([row['id'] for row in data['properties']], [self.nairobi.id])
+
+    def test_rejects_non_finite_prices(self):
+        for value in ('NaN', 'Infinity', '-inf', 'sNaN'):
+            response = self.client.get(reverse(self.url_name), {'min_price': value})
+            self.assertEqual(response.status_code, 400, value)
+            response = self.client.get(reverse(self.url_name), {'max_price': value})
+            self.assertEqual(response.status_code, 400, value)
+
+    def test_rejects_unknown_sort_field(self):
+        response = self.client.get(reverse(self.url_name), {'sort': 'title'})
+        self.assertEqual(response.status_code, 400)
+
+
+class PropertyDetailTests(CacheBehaviorTestCase):
+    url_name = 'properties:property_detail'
+
+    def get_detail(self, property_id):
+        return self.client.get(reverse(self.url_name, args=[property_id]))
+
+    def test_cold_warm_and_invalidated(self):
+        cache_key = f'property_detail:{self.nairobi.pk}'
+        with self.assertNumQueries(1), self.assertCacheGets([(cache_key, 'miss')]):
+            self.assertEqual(self.get_detail(self.nairobi.pk).json()['property']['title'], 'Garden Apartment')
+
+        with self.assertNumQueries(0), self.assertCacheGets([(cache_key, 'hit')]):
+            self.get_detail(self.nairobi.pk)
+
+        self.nairobi.title = 'Penthouse'
+        self.nairobi.save()
+        with self.assertNumQueries(1), self.assertCacheGets([(cache_key, 'miss')]):
+            self.assertEqual(self.get_detail(self.nairobi.pk).json()['property']['title'], 'Penthouse')
+
+    def test_missing_property(self):
+        self.assertEqual(self.get_detail(self.nairobi.pk + 1000).status_code, 404)
+
+
+class ViewCounterTests(CacheBehaviorTestCase):
+
+    def test_views_are_buffered_until_flushed(self):
+        self.client.get(reverse('properties:property_detail', args=[self.nairobi.pk]))
+        self.assertEqual(view_counters.get_most_viewed(), [])
+
+        self.assertEqual(view_counters.flush_view_buffer(), 1)
+        self.assertEqual(view_counters.get_most_viewed(), [(self.nairobi.pk, 1)])
+
+    @override_settings(PROPERTIES_VIEW_COUNTERS={'FLUSH_EVERY': 1000, 'FLUSH_INTERVAL': 0.05})
+    def test_idle_buffer_is_flushed_by_timer(self):
+        view_counters.record_views([self.nairobi.pk])
+        view_counters._buffer.timer.join(timeout=5)
+        self.assertEqual(view_counters.get_most_viewed(), [(self.nairobi.pk, 1)])
+
+    def test_flush_to_db_uses_one_update_per_batch(self):
+        view_counters.record_views([self.nairobi.pk] * 3 + [self.mombasa.pk] * 5)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(view_counters.flush_view_counts_to_db(), 8)
+        self.nairobi.refresh_from_db()
+        self.mombasa.refresh_from_db()
+        self.assertEqual((self.nairobi.view_count, self.mombasa.view_count), (3, 5))
+
+        # Counts are applied once
+        with self.assertNumQueries(0):
+            self.assertEqual(view_counters.flush_view_counts_to_db(), 0)
+
+    def test_flush_does_not_invalidate_catalog(self):
+        get_all_properties()
+        view_counters.record_views([self.nairobi.pk])
+        view_counters.flush_view_counts_to_db()
+        self.assertIsNotNone(cache.get('all_properties'))
+
+    def test_search_results_count_as_views(self):
+        self.client.get(reverse('properties:property_search'), {'location': 'Mombasa'})
+        view_counters.flush_view_buffer()
+        self.assertEqual(view_counters.get_most_viewed(), [(self.mombasa.pk, 1)])
+
+    @override_settings(PROPERTIES_VIEW_COUNTERS={'SEARCH_RESULTS_COUNTED': 1})
+    def test_only_top_search_results_count_as_views(self):
+        self.client.get(reverse('properties:property_search'), {'sort': '-price', 'limit': 1000000})
+        view_counters.flush_view_buffer()
+        self.assertEqual(view_counters.get_most_viewed(), [(self.mombasa.pk, 1)])
+
+    def test_delete_drops_view_counts(self):
+        view_counters.record_views([self.nairobi.pk, self.mombasa.pk])
+        view_counters.flush_view_buffer()
+        view_counters.record_views([self.mombasa.pk])
+
+        self.mombasa.delete()
+
+        self.assertEqual(view_counters.get_most_viewed(), [(self.nairobi.pk, 1)])
+        self.assertEqual(view_counters.flush_view_counts_to_db(), 1)
+
+    def test_most_viewed_cold_warm_and_invalidated(self):
+        url_name = 'properties:most_viewed'
+        ranking = view_counters.VIEW_RANKING_KEY
+        with self.assertNumQueries(0), self.assertCacheGets([(ranking, 'miss')]):
+            self.assertEqual(self.get_json(url_name)['count'], 0)
+
+        view_counters.record_views([self.nairobi.pk, self.mombasa.pk, self.mombasa.pk])
+        view_counters.flush_view_buffer()
+        with self.assertNumQueries(1), self.assertCacheGets([(ranking, 'hit')]):
+            data = self.get_json(url_name)
+        self.assertEqual([row['id'] for row in data['properties']], [self.mombasa.pk, self.nairobi.pk])
+
+        self.mombasa.delete()
+        with self.assertNumQueries(1), self.assertCacheGets([(ranking, 'hit')]):
+            data = self.get_json(url_name)
+        self.assertEqual([row['id'] for row in data['properties']], [self.nairobi.pk])
+
+    def test_most_viewed_endpoint(self):
+        view_counters.record_views([self.nairobi.pk, self.mombasa.pk, self.mombasa.pk])
+        view_counters.flush_view_buffer()
+
+        with self.assertNumQueries(1):
+            data = self.get_json('properties:most_viewed')
+        self.assertEqual(
+            [(row['id'], row['views']) for row in data['properties']],
+            [(self.mombasa.pk, 2), (self.nairobi.pk, 1)],
+        )
+
+
+@override_settings(ADAPTIVE_CACHE_TTL={
+    'WINDOW': 600,
+    'BUCKET': 60,
+    'READ_SAMPLE_RATE': 1,
+    'HOT_READS_PER_MINUTE': 60,
+    'DEFAULT': {'MIN': 300, 'MAX': 86400},
+    'NAMESPACES': {},
+})
+class AdaptiveTtlTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def record(self, namespace, reads=0, writes=0):
+        for _ in range(reads):
+            adaptive_ttl.record_read(namespace)
+        for _ in range(writes):
+            adaptive_ttl.record_write(namespace)
+        return adaptive_ttl.get_adaptive_ttl(namespace)
+
+    def test_hot_entries_are_kept_longer(self):
+        rarely_read = self.record('rarely_read', reads=1)
+        hot = self.record('hot', reads=6000)
+        self.assertLess(rarely_read, 1000)
+        self.assertGreater(hot, 50000)
+
+    def test_writes_shorten_ttl(self):
+        never_written = self.record('never_written', reads=6000)
+        often_written = self.record('often_written', reads=6000, writes=2)
+        self.assertLess(often_written, never_written)
+        self.assertLess(often_written, 600)
+        self.assertGreaterEqual(often_written, 300)
+
+    def test_sampled_reads_are_scaled_up(self):
+        config = {'READ_SAMPLE_RATE': 0.25, 'BUCKET': 60, 'WINDOW': 600}
+        with override_settings(ADAPTIVE_CACHE_TTL=config), \
+                mock.patch('properties.adaptive_ttl.random.random', side_effect=[0.1, 0.9, 0.9, 0.2]):
+            bucket = int(time.time() // 60)
+            for _ in range(4):
+                adaptive_ttl.record_read('sampled')
+        # Two of four reads were sampled, each counting for four
+        counts = cache.get_many([
+            adaptive_ttl._bucket_key('sampled', 'reads', b) for b in (bucket, bucket + 1)
+        ])
+        self.assertEqual(sum(counts.values()), 8)
+
+    def test_rates_are_shared_through_the_cache(self):
+        adaptive_ttl.record_write('shared')
+        adaptive_ttl._namespaces.discard('shared')
+        # Another process sees the write through the cache counters
+        self.assertGreater(adaptive_ttl.get_rates('shared')[1], 0)
+
+
+class ContentEncodingTests(CacheBehaviorTestCase):
+
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding(''), 'identity')
+        self.assertEqual(choose_encoding('gzip, deflate'), 'gzip')
+        self.assertEqual(choose_encoding('gzip;q=0, identity'), 'identity')
+        self.assertEqual(choose_encoding('deflate'), 'identity')
+        self.assertEqual(choose_encoding('identity;q=0.5, gzip;q=0.8'), 'gzip')
+        self.assertEqual(choose_encoding('*'), get_supported_encodings()[0])
+
+    def test_page_cache_varies_on_accept_encoding(self):
+        url = reverse('properties:property_list')
+        plain = self.client.get(url)
+        compressed = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(compressed.content)), plain.json())
+
+    def test_page_cache_keeps_one_copy_per_encoding(self):
+        url = reverse('properties:property_list')
+        self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        with self.assertNumQueries(0), self.assertCacheGets([
+            ('page_header', 'hit'),
+            ('page', 'hit'),
+        ]):
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING='deflate, gzip;q=0.9, identity;q=0.5')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+
+class CacheStatusTests(CacheBehaviorTestCase):
+    url_name = 'properties:cache_status'
+
+    def test_cold_warm_and_invalidated(self):
+        with self.assertNumQueries(1), self.assertCacheGets([(ALL_PROPERTIES_META_KEY, 'miss')]):
+            data = self.get_json(self.url_name)
+        self.assertFalse(data['cache_status']['is_cached'])
+
+        get_all_properties()
+        with self.assertNumQueries(1), self.assertCacheGets([(ALL_PROPERTIES_META_KEY, 'hit')]):
+            data = self.get_json(self.url_name)
+        self.assertTrue(data['cache_db_sync'])
+        self.assertEqual(data['cache_status']['cached_count'], 2)
+
+        self.nairobi.delete()
+        with self.assertNumQueries(1), self.assertCacheGets([(ALL_PROPERTIES_META_KEY, 'miss')]):
+            data = self.get_json(self.url_name)
+        self.assertFalse(data['cache_status']['is_cached'])
+
+
+class CacheMetricsTests(CacheBehaviorTestCase):
+    url_name = 'properties:cache_metrics'
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_user('ops', is_staff=True))
+
+    def test_cold_warm_and_invalidated(self):
+        metrics_sampler._sampler = None
+        session = self.client.session.cache_key
+        get_all_properties()
+
+        # Cold: the first request takes a sample on demand
+        with self.assertNumQueries(1), self.assertCacheGets([
+            (session, 'hit'),
+            (ALL_PROPERTIES_META_KEY, 'hit'),
+        ]):
+            data = self.get_json(self.url_name)
+        self.assertEqual(data['application_cache_status']['cached_count'], 2)
+
+        # Warm: served from the sample, without reading the cache
+        with self.assertNumQueries(1), self.assertCacheGets([(session, 'hit')]), \
+                mock.patch('properties.metrics_sampler.get_key_stats') as get_key_stats:
+            data = self.get_json(self.url_name)
+        get_key_stats.assert_not_called()
+        self.assertIn('adaptive_ttls', data)
+        self.assertIn('hot_keys', data['key_stats'])
+        self.assertIn('windows', data['redis_metrics'])
+        self.assertEqual(data['application_cache_status']['cached_count'], 2)
+
+        # Invalidated: the sample is kept until the next poll, which sees it
+        self.nairobi.delete()
+        with self.assertNumQueries(1), self.assertCacheGets([(session, 'hit')]):
+            self.assertTrue(self.get_json(self.url_name)['application_cache_status']['is_cached'])
+        with self.assertCacheGets([(ALL_PROPERTIES_META_KEY, 'miss')]):
+            get_cache_metrics_sampler().sample()
+        with self.assertNumQueries(1), self.assertCacheGets([(session, 'hit')]):
+            self.assertFalse(self.get_json(self.url_name)['application_cache_status']['is_cached'])
+
+    def test_requires_staff(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse(self.url_name)).status_code, 403)
+
+
+class CacheMetricsSamplerTests(TestCase):
+
+    def make_sample(self, timestamp, hits, misses):
+        return {'timestamp': timestamp, 'keyspace_hits': hits, 'keyspace_misses': misses}
+
+    def test_window_deltas(self):
+        sampler = CacheMetricsSampler(interval=10, capacity=100, background=False)
+        for offset, hits, misses in ((0, 100, 100), (240, 200, 120), (290, 290, 130), (300, 300, 130)):
+            sampler.samples.append(self.make_sample(1000 + offset, hits, misses))
+        latest = sampler.samples[-1]
+
+        window = sampler.window(60, latest)
+        self.assertEqual((window['seconds'], window['hits'], window['misses']), (60, 100, 10))
+        self.assertEqual(window['hit_ratio_percentage'], 90.91)
+
+        window = sampler.window(300, latest)
+        self.assertEqual((window['hits'], window['misses']), (200, 30))
+
+    def test_window_ignores_counter_reset(self):
+        sampler = CacheMetricsSampler(interval=10, capacity=100, background=False)
+        sampler.samples.append(self.make_sample(1000, 500, 50))
+        sampler.samples.append(self.make_sample(1010, 5, 1))
+        self.assertIsNone(sampler.window(60, sampler.samples[-1]))
+
+    def test_ring_buffer_is_bounded(self):
+        sampler = CacheMetricsSampler(interval=10, capacity=3, background=False)
+        for _ in range(5):
+            sampler.sample()
+        self.assertEqual(len(sampler.samples), 3)
+
+
+class SignalInvalidationTests(CacheBehaviorTestCase):
+
+    def warm_caches(self):
+        get_all_properties()
+        self.client.get(reverse('properties:property_list'))
+        return get_catalog_generation()
+
+    def assertCatalogInvalidated(self, generation):
+        self.assertIsNone(cache.get('all_properties'))
+        self.assertGreater(get_catalog_generation(), generation)
+        with self.assertNumQueries(1):
+            self.client.get(reverse('properties:property_list'))
+
+    def test_create_invalidates_catalog(self):
+        generation = self.warm_caches()
+        Property.objects.create(
+            title='Loft', description='City views', price=Decimal('90000.00'), location='Kisumu'
+        )
+        self.assertCatalogInvalidated(generation)
+
+    def test_update_invalidates_catalog(self):
+        generation = self.warm_caches()
+        self.nairobi.title = 'Renovated Garden Apartment'
+        self.nairobi.save()
+        self.assertCatalogInvalidated(generation)
+
+    def test_delete_invalidates_catalog(self):
+        generation = self.warm_caches()
+        self.nairobi.delete()
+        self.assertCatalogInvalidated(generation)
+
+    def test_move_invalidates_old_and_new_location_tags(self):
+        set_with_tags('nairobi_page', 'cached', 60, tags=['location:Nairobi'])
+        set_with_tags('kisumu_page', 'cached', 60, tags=['location:Kisumu'])
+        set_with_tags('mombasa_page', 'cached', 60, tags=['location:Mombasa'])
+
+        moved = Property.objects.get(pk=self.nairobi.pk)
+        moved.location = 'Kisumu'
+        moved.save()
+
+        self.assertIsNone(cache.get('nairobi_page'))
+        self.assertIsNone(cache.get('kisumu_page'))
+        self.assertEqual(cache.get('mombasa_page'), 'cached')
+
+    def test_property_tag_is_invalidated(self):
+        set_with_tags('detail', 'cached', 60, tags=[f'property:{self.mombasa.pk}'])
+        set_with_tags('other_detail', 'cached', 60, tags=[f'property:{self.nairobi.pk}'])
+
+        self.mombasa.delete()
+
+        self.assertIsNone(cache.get('detail'))
+        self.assertEqual(cache.get('other_detail'), 'cached')
+
+
+class QueryBudgetTests(CacheBehaviorTestCase):
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('properties:property_list_no_page_cache'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+    @override_settings(PROPERTIES_PROFILING={
+        'QUERY_BUDGETS': {'properties:cache_status': 0},
+        'QUERY_BUDGET_ACTION': 'raise',
+    })
+    def test_exceeded_budget_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('properties:cache_status'))
+
+
+class SeedPropertiesCommandTests(CacheBehaviorTestCase):
+
+    def test_loads_rows_and_invalidates_once(self):
+        get_all_properties()
+        generation = get_catalog_generation()
+
+        with mock.patch('properties.signals.invalidate_properties_cache',
+                        wraps=invalidate_properties_cache) as invalidate:
+            call_command('seed_properties', count=250, batch_size=100, clear=True, stdout=StringIO())
+
+        invalidate.assert_called_once()
+        self.assertEqual(Property.objects.count(), 250)
+        self.assertIsNone(cache.get('all_properties'))
+        self.assertGreater(get_catalog_generation(), generation)
+
+    def test_clear_drops_detail_entries_and_view_counts(self):
+        self.client.get(reverse('properties:property_detail', args=[self.nairobi.pk]))
+        view_counters.flush_view_buffer()
+        set_with_tags('mombasa_page', 'cached', 60, tags=['location:Mombasa'])
+        self.mombasa.location = 'Atlantis'
+        self.mombasa.save()
+        set_with_tags('atlantis_page', 'cached', 60, tags=['location:Atlantis'])
+
+        call_command('seed_properties', count=5, clear=True, stdout=StringIO())
+
+        self.assertIsNone(cache.get(f'property_detail:{self.nairobi.pk}'))
+        self.assertIsNone(cache.get('atlantis_page'))
+        self.assertEqual(view_counters.get_most_viewed(), [])
+        response = self.client.get(reverse('properties:property_detail', args=[self.nairobi.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_created_at_is_spread_over_days(self):
+        call_command('seed_properties', count=50, days=30, clear=True, stdout=StringIO())
+        created = list(Property.objects.values_list('created_at', flat=True))
+        self.assertEqual(len(set(created)), 50)
+        self.assertGreater(max(created) - min(created), timedelta(days=1))
+        self.assertLessEqual(max(created) - min(created), timedelta(days=30))
+
+    def test_same_seed_generates_same_listings(self):
+        call_command('seed_properties', count=20, seed=7, clear=True, stdout=StringIO())
+        first = list(Property.objects.order_by('id').values_list('title', 'price', 'location'))
+        call_command('seed_properties', count=20, seed=7, clear=True, stdout=StringIO())
+        second = list(Property.objects.order_by('id').values_list('title', 'price', 'location'))
+        self.assertEqual(first, second)
+
+
+class KeyStatsTests(TestCase):
+
+    def test_count_min_sketch_never_undercounts(self):
+        sketch = CountMinSketch(width=64, depth=4)
+        counts = {f'key{i}': i + 1 for i in range(200)}
+        for key, count in counts.items():
+            sketch.add(key, count)
+        for key, count in counts.items():
+            self.assertGreaterEqual(sketch.estimate(key), count)
+
+    def test_tracker_keeps_hottest_keys(self):
+        tracker = HotKeyTracker(sample_rate=1, top_k=2, width=256, depth=4)
+        for key, count in (('all_properties', 50), ('page', 30), ('rare', 2)):
+            for _ in range(count):
+                tracker.record(key)
+        self.assertEqual(tracker.hot_keys(), [('all_properties', 50), ('page', 30)])
+
+    def test_key_group(self):
+        self.assertEqual(key_group(cache.make_key('tag:catalog')), 'tag')
+        self.assertEqual(
+            key_group(cache.make_key('views.decorators.cache.cache_page..GET.abc.def.en-us.UTC')),
+            'views.decorators.cache.cache_page',
+        )
+
+    def test_non_app_keys_collapse_into_fixed_groups(self):
+        session_key = 'django.contrib.sessions.cacheabc123secret'
+        self.assertEqual(key_group(cache.make_key(session_key)), 'django.contrib.sessions.cache')
+        self.assertEqual(key_group('django.contrib.sessions.cached_dbabc123'), 'django.contrib.sessions.cached_db')
+        self.assertEqual(key_group(cache.make_key('unrelated:key')), 'other')
+
+    @override_settings(PROPERTIES_KEY_STATS={'SAMPLE_RATE': 1})
+    def test_session_keys_are_not_tracked(self):
+        tracker = HotKeyTracker(sample_rate=1, top_k=5, width=256, depth=4)
+        with mock.patch('properties.keystats._tracker', tracker):
+            record_key_access('django.contrib.sessions.cacheabc123secret')
+            record_key_access('all_properties')
+        self.assertEqual(tracker.hot_keys(), [('all_properties', 1)])
+
+    def test_cache_metrics_reports_key_stats(self):
+        self.client.force_login(User.objects.create_user('ops', is_staff=True))
+        data = self.client.get(reverse('properties:cache_metrics')).json()
+        self.assertEqual(data['key_stats']['hot_keys_source'], 'process')
+        self.assertIn('error', data['key_stats']['memory_by_prefix'])
+
+
+@skipUnless(fakeredis, 'fakeredis and lupa are required for the Redis code paths')
+class RedisBackedTests(CacheBehaviorTestCase):
+    """
+    Runs the Redis branches of the tag registry, view counters and key
+    stats against fakeredis. Cached values stay in locmem; only the raw
+    Redis structures go to the fake server.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.redis = fakeredis.FakeRedis()
+        for module in ('cache_tags', 'view_counters', 'keystats'):
+            patcher = mock.patch(f'properties.{module}.get_redis_client', return_value=self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tag_key(self, tag):
+        return cache.make_key(f'tag:{tag}')
+
+    def test_register_and_invalidate_tags(self):
+        for key in ('page_a', 'page_b', 'other'):
+            self.redis.set(cache.make_key(key), 'cached')
+        register_tags('page_a', ['location:Nairobi', 'catalog'], 60)
+        register_tags('page_b', ['catalog'], 60)
+        register_tags('other', ['location:Mombasa'], 60)
+
+        self.assertEqual(invalidate_tags('catalog'), 2)
+        self.assertFalse(self.redis.exists(cache.make_key('page_a'), cache.make_key('page_b')))
+        self.assertFalse(self.redis.exists(self.tag_key('catalog')))
+        self.assertTrue(self.redis.exists(cache.make_key('other')))
+
+    def test_tag_expiry_covers_longest_lived_member(self):
+        register_tags('short', ['t'], 60)
+        register_tags('long', ['t'], 300)
+        register_tags('shorter', ['t'], 30)
+        self.assertEqual(self.redis.ttl(self.tag_key('t')), 300)
+
+        register_tags('forever', ['t'], None)
+        register_tags('short_again', ['t'], 60)
+        self.assertEqual(self.redis.ttl(self.tag_key('t')), -1)
+
+        self.redis.set(cache.make_key('forever'), 'cached')
+        invalidate_tags('t')
+        self.assertFalse(self.redis.exists(cache.make_key('forever')))
+
+    def test_view_counts_flow_through_redis_to_db(self):
+        view_counters.record_views([self.nairobi.pk] * 2 + [self.mombasa.pk])
+        view_counters.flush_view_buffer()
+        pending = self.redis.hgetall(cache.make_key(view_counters.PENDING_VIEWS_KEY))
+        self.assertEqual(pending, {str(self.nairobi.pk).encode(): b'2', str(self.mombasa.pk).encode(): b'1'})
+        self.assertEqual(view_counters.get_most_viewed(), [(self.nairobi.pk, 2), (self.mombasa.pk, 1)])
+
+        # One UPDATE, inside a savepoint under the test transaction
+        with self.assertNumQueries(3):
+            self.assertEqual(view_counters.flush_view_counts_to_db(), 3)
+        self.nairobi.refresh_from_db()
+        self.assertEqual(self.nairobi.view_count, 2)
+        self.assertFalse(self.redis.exists(
+            cache.make_key(view_counters.PENDING_VIEWS_KEY),
+            cache.make_key(view_counters.FLUSHING_VIEWS_KEY),
+        ))
+        # The ranking keeps its totals after the database flush
+        self.assertEqual(view_counters.get_most_viewed(), [(self.nairobi.pk, 2), (self.mombasa.pk, 1)])
+
+    def test_failed_flush_is_retried_without_double_counting(self):
+        view_counters.record_views([self.nairobi.pk] * 4)
+        view_counters.flush_view_buffer()
+
+        with mock.patch('properties.view_counters._apply_view_counts', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                view_counters.flush_view_counts_to_db()
+        self.assertEqual(
+            self.redis.hgetall(cache.make_key(view_counters.FLUSHING_VIEWS_KEY)),
+            {str(self.nairobi.pk).encode(): b'4'},
+        )
+
+        # Removing the batch fails after the UPDATE ran: the UPDATE is rolled back
+        with mock.patch.object(self.redis, 'hdel', side_effect=ConnectionError):
+            with self.assertRaises(ConnectionError):
+                view_counters.flush_view_counts_to_db()
+        self.nairobi.refresh_from_db()
+        self.assertEqual(self.nairobi.view_count, 0)
+
+        # Views recorded meanwhile wait in a fresh pending hash
+        view_counters.record_views([self.nairobi.pk])
+        view_counters.flush_view_buffer()
+        self.assertEqual(view_counters.flush_view_counts_to_db(), 4)
+        self.assertEqual(view_counters.flush_view_counts_to_db(), 1)
+        self.nairobi.refresh_from_db()
+        self.assertEqual(self.nairobi.view_count, 5)
+
+    def test_delete_removes_property_from_ranking_and_pending(self):
+        view_counters.record_views([self.nairobi.pk, self.mombasa.pk])
+        view_counters.flush_view_buffer()
+        self.mombasa.delete()
+        self.assertEqual(view_counters.get_most_viewed(), [(self.nairobi.pk, 1)])
+        self.assertEqual(
+            self.redis.hkeys(cache.make_key(view_counters.PENDING_VIEWS_KEY)),
+            [str(self.nairobi.pk).encode()],
+        )
+
+    def test_hot_keys_are_published_to_redis(self):
+        tracker = HotKeyTracker(sample_rate=1, top_k=5, width=256, depth=4)
+        for key, count in (('all_properties', 3), ('property_detail:1', 1)):
+            for _ in range(count):
+                tracker.record(key)
+        publish_hot_keys(tracker)
+        self.assertEqual(get_shared_hot_keys(5), [('all_properties', 3), ('property_detail:1', 1)])
@@ -6,6 +6,9 @@ app_name = 'properties'
 urlpatterns = [
     path('', views.property_list, name='property_list'),
     path('no-page-cache/', views.property_list_no_page_cache, name='property_list_no_page_cache'),
+    path('search/', views.property_search, name='property_search'),
+    path('most-viewed/', views.most_viewed, name='most_viewed'),
+    path('<int:property_id>/', views.property_detail, name='property_detail'),
     path('cache-status/', views.cache_status, name='cache_status'),
     path('cache-metrics/', views.cache_metrics, name='cache_metrics'),
 ]
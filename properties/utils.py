@@ -1,21 +1,44 @@
 from django.core.cache import cache
+from django.utils import timezone
 from django_redis import get_redis_connection
 import logging
+import time
 from .models import Property
+from .cache_tags import invalidate_tags, set_many_with_tags, set_with_tags
+from .adaptive_ttl import get_adaptive_ttl, record_read
 
 # Set up logging for cache metrics
 logger = logging.getLogger(__name__)
 
+# Tag attached to every cache entry derived from the whole catalog
+CATALOG_TAG = 'catalog'
+
+# Tag attached to every per-property detail entry, for bulk deletes
+PROPERTY_DETAIL_TAG = 'property_detail'
+
+# Adaptive TTL namespaces whose data changes with any property write
+CATALOG_NAMESPACES = ('all_properties', 'property_list_page')
+
+# Small entry cached with all_properties so status checks don't load it
+ALL_PROPERTIES_META_KEY = 'all_properties:meta'
+
+# INFO sections read for cache metrics; a full INFO is much larger
+REDIS_INFO_SECTIONS = ('stats', 'memory', 'clients', 'keyspace')
+
+# Counter bumped on every catalog change; never expires
+CATALOG_GENERATION_KEY = 'properties_catalog_generation'
+
 
 def get_all_properties():
     """
     Get all properties from cache or database.
-    Uses low-level cache API to cache the queryset for 1 hour.
+    Uses low-level cache API to cache the queryset with an adaptive TTL.
     
     Returns:
         QuerySet: All Property objects
     """
     # Try to get properties from cache first
+    record_read('all_properties')
     cached_properties = cache.get('all_properties')
     
     if cached_properties is not None:
@@ -29,36 +52,207 @@ def get_all_properties():
     # Convert queryset to list to make it cacheable
     properties_list = list(queryset)
     
-    # Store in cache for 1 hour (3600 seconds)
-    cache.set('all_properties', properties_list, 3600)
+    # Store in cache with a TTL chosen from observed read/write rates,
+    # alongside lightweight metadata for status checks
+    timeout = get_adaptive_ttl('all_properties')
+    set_many_with_tags({
+        'all_properties': properties_list,
+        ALL_PROPERTIES_META_KEY: {
+            'count': len(properties_list),
+            'cached_at': timezone.now().isoformat(),
+        },
+    }, timeout, tags=[CATALOG_TAG])
     
     return properties_list
 
 
+def get_property_detail(property_id):
+    """
+    Get a single property's details from cache or database.
+    The cached entry is tagged with the property, so saving or deleting
+    the property invalidates it, and with PROPERTY_DETAIL_TAG so bulk
+    deletes can drop every detail entry at once.
+    
+    Args:
+        property_id: Primary key of the property
+    
+    Returns:
+        dict: JSON-serializable property details, or None if it doesn't exist
+    """
+    cache_key = f'property_detail:{property_id}'
+    record_read('property_detail')
+    property_data = cache.get(cache_key)
+    if property_data is not None:
+        return property_data
+    
+    property_obj = Property.objects.filter(pk=property_id).first()
+    if property_obj is None:
+        return None
+    
+    property_data = {
+        'id': property_obj.id,
+        'title': property_obj.title,
+        'description': property_obj.description,
+        'price': str(property_obj.price),  # Convert Decimal to string for JSON
+        'location': property_obj.location,
+        'created_at': property_obj.created_at.isoformat(),
+    }
+    set_with_tags(cache_key, property_data, get_adaptive_ttl('property_detail'),
+                  tags=[f'property:{property_id}', PROPERTY_DETAIL_TAG])
+    return property_data
+
+
 def invalidate_properties_cache():
     """
-    Utility function to invalidate the properties cache.
+    Utility function to invalidate every cache entry tagged with the catalog.
     Useful when properties are added, updated, or deleted.
     """
-    cache.delete('all_properties')
+    invalidate_tags(CATALOG_TAG)
+    bump_catalog_generation()
     print("Properties cache invalidated")  # Debug info
 
 
+def get_property_tags(property_obj, previous_location=None):
+    """
+    Get the cache tags affected by a change to a property.
+    
+    Args:
+        property_obj: The Property being changed
+        previous_location: Location before the change, if it moved
+    
+    Returns:
+        list: Tags to invalidate
+    """
+    tags = [CATALOG_TAG, f'property:{property_obj.pk}', f'location:{property_obj.location}']
+    if previous_location is not None and previous_location != property_obj.location:
+        tags.append(f'location:{previous_location}')
+    return tags
+
+
+def get_catalog_generation():
+    """
+    Get the current catalog generation.
+    The generation changes whenever a property is created, updated or deleted,
+    so it can be used to detect stale in-process copies of the catalog.
+    
+    Returns:
+        int: Current catalog generation
+    """
+    generation = cache.get(CATALOG_GENERATION_KEY)
+    if generation is None:
+        # Seed the counter; add() keeps a concurrent seed from being overwritten
+        cache.add(CATALOG_GENERATION_KEY, _generation_seed(), None)
+        generation = cache.get(CATALOG_GENERATION_KEY)
+    return generation
+
+
+def bump_catalog_generation():
+    """
+    Advance the catalog generation after the catalog has changed.
+    
+    Returns:
+        int: The new catalog generation
+    """
+    try:
+        return cache.incr(CATALOG_GENERATION_KEY)
+    except ValueError:
+        # Key missing (first change or evicted); start a fresh generation
+        cache.add(CATALOG_GENERATION_KEY, _generation_seed(), None)
+        return cache.incr(CATALOG_GENERATION_KEY)
+
+
+def _generation_seed():
+    # Seed from the clock so a flushed cache never repeats a generation
+    # that an in-process snapshot may still hold
+    return time.time_ns() // 1000
+
+
 def get_cache_status():
     """
     Utility function to check if properties are cached.
+    Uses the metadata stored next to the cached properties, so it stays
+    cheap regardless of catalog size.
     
     Returns:
         dict: Cache status information
     """
-    cached_properties = cache.get('all_properties')
+    # Read the small metadata entry rather than unpickling the whole catalog
+    metadata = cache.get(ALL_PROPERTIES_META_KEY)
     return {
-        'is_cached': cached_properties is not None,
-        'cached_count': len(cached_properties) if cached_properties else 0,
+        'is_cached': metadata is not None,
+        'cached_count': metadata['count'] if metadata else 0,
+        'cached_at': metadata['cached_at'] if metadata else None,
         'cache_key': 'all_properties'
     }
 
 
+def read_redis_info(redis_client):
+    """
+    Fetch only the Redis INFO sections the cache metrics need, in one round trip.
+    
+    Args:
+        redis_client: Raw Redis client
+    
+    Returns:
+        dict: Merged fields of the stats, memory, clients and keyspace sections
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    for section in REDIS_INFO_SECTIONS:
+        pipe.info(section)
+    info = {}
+    for section_info in pipe.execute():
+        info.update(section_info)
+    return info
+
+
+def get_cache_efficiency(hit_ratio):
+    """
+    Classify a hit ratio percentage as Good, Fair or Poor.
+    """
+    return 'Good' if hit_ratio > 80 else 'Fair' if hit_ratio > 50 else 'Poor'
+
+
+def summarize_redis_info(info):
+    """
+    Build cache metrics from Redis INFO fields.
+    
+    Args:
+        info: Fields as returned by read_redis_info()
+    
+    Returns:
+        dict: Cache metrics including hits, misses, hit ratio, and other stats
+    """
+    # Extract keyspace statistics
+    keyspace_hits = info.get('keyspace_hits', 0)
+    keyspace_misses = info.get('keyspace_misses', 0)
+    
+    # Calculate total operations and hit ratio
+    total_operations = keyspace_hits + keyspace_misses
+    total_requests = total_operations  # Alias for clarity
+    hit_ratio = (keyspace_hits / total_requests * 100) if total_requests > 0 else 0
+    miss_ratio = (keyspace_misses / total_requests * 100) if total_requests > 0 else 0
+    
+    # Get database-specific information
+    db_info = {}
+    for key, value in info.items():
+        if key.startswith('db'):
+            db_info[key] = value
+    
+    return {
+        'keyspace_hits': keyspace_hits,
+        'keyspace_misses': keyspace_misses,
+        'total_operations': total_operations,
+        'hit_ratio_percentage': round(hit_ratio, 2),
+        'miss_ratio_percentage': round(miss_ratio, 2),
+        'used_memory_bytes': info.get('used_memory', 0),
+        'used_memory_human': info.get('used_memory_human', 'N/A'),
+        'connected_clients': info.get('connected_clients', 0),
+        'total_commands_processed': info.get('total_commands_processed', 0),
+        'database_info': db_info,
+        'cache_efficiency': get_cache_efficiency(hit_ratio),
+    }
+
+
 def get_redis_cache_metrics():
     """
     Retrieve and analyze Redis cache hit/miss metrics.
@@ -70,44 +264,14 @@ def get_redis_cache_metrics():
         # Get Redis connection using django_redis
         redis_client = get_redis_connection("default")
         
-        # Get Redis INFO stats
-        info = redis_client.info()
-        
-        # Extract keyspace statistics
-        keyspace_hits = info.get('keyspace_hits', 0)
-        keyspace_misses = info.get('keyspace_misses', 0)
-        
-        # Calculate total operations and hit ratio
-        total_operations = keyspace_hits + keyspace_misses
-        total_requests = total_operations  # Alias for clarity
-        hit_ratio = (keyspace_hits / total_requests * 100) if total_requests > 0 else 0
-        miss_ratio = (keyspace_misses / total_requests * 100) if total_requests > 0 else 0
-        
-        # Get additional useful metrics
-        used_memory = info.get('used_memory', 0)
-        used_memory_human = info.get('used_memory_human', 'N/A')
-        connected_clients = info.get('connected_clients', 0)
-        total_commands_processed = info.get('total_commands_processed', 0)
-        
-        # Get database-specific information
-        db_info = {}
-        for key, value in info.items():
-            if key.startswith('db'):
-                db_info[key] = value
-        
-        metrics = {
-            'keyspace_hits': keyspace_hits,
-            'keyspace_misses': keyspace_misses,
-            'total_operations': total_operations,
-            'hit_ratio_percentage': round(hit_ratio, 2),
-            'miss_ratio_percentage': round(miss_ratio, 2),
-            'used_memory_bytes': used_memory,
-            'used_memory_human': used_memory_human,
-            'connected_clients': connected_clients,
-            'total_commands_processed': total_commands_processed,
-            'database_info': db_info,
-            'cache_efficiency': 'Good' if hit_ratio > 80 else 'Fair' if hit_ratio > 50 else 'Poor'
-        }
+        # Get the Redis INFO sections the metrics are built from
+        metrics = summarize_redis_info(read_redis_info(redis_client))
+        keyspace_hits = metrics['keyspace_hits']
+        keyspace_misses = metrics['keyspace_misses']
+        total_operations = metrics['total_operations']
+        hit_ratio = metrics['hit_ratio_percentage']
+        miss_ratio = metrics['miss_ratio_percentage']
+        used_memory_human = metrics['used_memory_human']
         
         # Log the metrics
         logger.info(f"Redis Cache Metrics: "
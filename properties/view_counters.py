@@ -0,0 +1,312 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from redis.exceptions import ResponseError
+
+from .cache_tags import get_redis_client, update_cached_dict
+from .conf import get_app_settings
+from .models import Property
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROPERTIES_VIEW_COUNTERS = {
+    # Flush the in-process buffer to Redis after this many buffered views...
+    'FLUSH_EVERY': 100,
+    # ...or once the oldest buffered view is this many seconds old, checked
+    # on each view and by a timer, so an idle worker still flushes
+    'FLUSH_INTERVAL': 5,
+    # Properties updated per bulk UPDATE when flushing to the database
+    'DB_BATCH_SIZE': 1000,
+    # Top search results counted as viewed per search
+    'SEARCH_RESULTS_COUNTED': 10,
+}
+
+# Hash of property id -> views not yet applied to the database
+PENDING_VIEWS_KEY = 'property_views:pending'
+# Same hash, renamed while a database flush is applying it
+FLUSHING_VIEWS_KEY = 'property_views:flushing'
+# Sorted set of property id -> total views, used for the ranking
+VIEW_RANKING_KEY = 'property_views:ranking'
+
+
+class ViewCounterBuffer:
+    """
+    In-process buffer of property views, flushed to Redis in one pipeline.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.buffered = 0
+        self.started_at = None
+        self.timer = None
+        self.lock = threading.Lock()
+
+    def add(self, property_ids):
+        """
+        Buffer one view for each property id.
+
+        Returns:
+            bool: True if the buffer is due to be flushed
+        """
+        config = get_app_settings('PROPERTIES_VIEW_COUNTERS', DEFAULT_PROPERTIES_VIEW_COUNTERS)
+        with self.lock:
+            if self.started_at is None:
+                self.started_at = time.monotonic()
+                self._start_timer(config['FLUSH_INTERVAL'])
+            for property_id in property_ids:
+                self.counts[property_id] += 1
+                self.buffered += 1
+            return (
+                self.buffered >= config['FLUSH_EVERY']
+                or time.monotonic() - self.started_at >= config['FLUSH_INTERVAL']
+            )
+
+    def _start_timer(self, interval):
+        # Flush views buffered by a worker that then goes idle. One timer
+        # runs per buffer fill and is cancelled when the buffer is taken;
+        # timers don't survive fork(), so a forked worker starts its own.
+        if self.timer is not None and self.timer.is_alive():
+            return
+        self.timer = threading.Timer(interval, flush_view_buffer)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def discard(self, property_id):
+        """
+        Drop any buffered views of a property.
+        """
+        with self.lock:
+            self.buffered -= self.counts.pop(property_id, 0)
+
+    def take(self):
+        """
+        Empty the buffer and return its counts.
+        """
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+            self.buffered = 0
+            self.started_at = None
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        return counts
+
+
+_buffer = ViewCounterBuffer()
+
+
+def record_views(property_ids):
+    """
+    Count a view for each of the given properties.
+
+    Views are buffered in process and flushed to Redis with HINCRBY/ZINCRBY
+    in a single pipeline once enough have accumulated, or FLUSH_INTERVAL
+    seconds after the first buffered view.
+
+    Args:
+        property_ids: Iterable of Property primary keys
+    """
+    if _buffer.add(property_ids):
+        flush_view_buffer()
+
+
+def flush_view_buffer():
+    """
+    Push buffered views to Redis: the pending hash for the database flush
+    and the ranking sorted set.
+
+    Returns:
+        int: Number of views flushed
+    """
+    counts = _buffer.take()
+    if not counts:
+        return 0
+
+    redis_client = get_redis_client()
+    if redis_client is None:
+        _flush_buffer_to_cache(counts)
+        return sum(counts.values())
+
+    pending_key = cache.make_key(PENDING_VIEWS_KEY)
+    ranking_key = cache.make_key(VIEW_RANKING_KEY)
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for property_id, count in counts.items():
+            pipe.hincrby(pending_key, property_id, count)
+            pipe.zincrby(ranking_key, count, property_id)
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Error flushing property view counts: {str(e)}")
+        return 0
+    return sum(counts.values())
+
+
+# Don't lose buffered views when a worker shuts down cleanly
+atexit.register(flush_view_buffer)
+
+
+def flush_view_counts_to_db(batch_size=None):
+    """
+    Apply accumulated view counts to Property.view_count.
+
+    The pending hash is renamed before it is read, so views recorded during
+    the flush go to a fresh hash. Each batch is applied with one bulk UPDATE
+    and removed from the renamed hash before the UPDATE commits, so a flush
+    interrupted by a crash resumes from the remaining entries on the next
+    run without applying any batch twice. Delivery is at most once: a crash
+    after a batch is removed but before its UPDATE commits loses that
+    batch's views.
+
+    Args:
+        batch_size: Properties per UPDATE (defaults to DB_BATCH_SIZE)
+
+    Returns:
+        int: Number of views applied
+    """
+    config = get_app_settings('PROPERTIES_VIEW_COUNTERS', DEFAULT_PROPERTIES_VIEW_COUNTERS)
+    batch_size = batch_size or config['DB_BATCH_SIZE']
+    flush_view_buffer()
+
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return _flush_cache_counts_to_db(batch_size)
+
+    pending_key = cache.make_key(PENDING_VIEWS_KEY)
+    flushing_key = cache.make_key(FLUSHING_VIEWS_KEY)
+    if not redis_client.exists(flushing_key):
+        try:
+            redis_client.rename(pending_key, flushing_key)
+        except ResponseError:
+            # No pending views
+            return 0
+
+    applied = 0
+    batch = {}
+    for property_id, count in redis_client.hscan_iter(flushing_key, count=batch_size):
+        batch[int(property_id)] = int(count)
+        if len(batch) >= batch_size:
+            applied += _apply_batch(redis_client, flushing_key, batch)
+            batch = {}
+    if batch:
+        applied += _apply_batch(redis_client, flushing_key, batch)
+    return applied
+
+
+def _apply_batch(redis_client, flushing_key, batch):
+    """
+    Apply one batch and remove it from the flushing hash, at most once.
+
+    The batch is removed inside the UPDATE's transaction: if the UPDATE
+    fails nothing is removed, and if the commit raises the counts are put
+    back. If the process dies after the removal but before the commit, the
+    batch is lost; it is never applied twice.
+    """
+    removed = False
+    try:
+        with transaction.atomic():
+            applied = _apply_view_counts(batch)
+            redis_client.hdel(flushing_key, *batch)
+            removed = True
+    except Exception:
+        if removed:
+            pipe = redis_client.pipeline(transaction=True)
+            for property_id, count in batch.items():
+                pipe.hincrby(flushing_key, property_id, count)
+            pipe.execute()
+        raise
+    return applied
+
+
+def _apply_view_counts(counts):
+    """
+    Add view counts to many properties with a single UPDATE statement.
+    """
+    Property.objects.filter(pk__in=counts).update(
+        view_count=F('view_count') + Case(
+            *[When(pk=property_id, then=Value(count)) for property_id, count in counts.items()],
+            default=Value(0),
+        )
+    )
+    return sum(counts.values())
+
+
+def clear_view_counts():
+    """
+    Drop all buffered, pending and ranked view counts, e.g. after every
+    property has been deleted in bulk.
+    """
+    _buffer.take()
+    cache.delete_many([PENDING_VIEWS_KEY, FLUSHING_VIEWS_KEY, VIEW_RANKING_KEY])
+
+
+def forget_property_views(property_id):
+    """
+    Drop a deleted property's buffered, pending and ranked views, so the
+    ranking only holds live properties and a reused id starts from zero.
+
+    Args:
+        property_id: Primary key of the deleted property
+    """
+    _buffer.discard(property_id)
+
+    redis_client = get_redis_client()
+    if redis_client is None:
+        def remove(current):
+            current.pop(property_id, None)
+            return current, None
+
+        update_cached_dict(PENDING_VIEWS_KEY, remove)
+        update_cached_dict(VIEW_RANKING_KEY, remove)
+        return
+
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zrem(cache.make_key(VIEW_RANKING_KEY), property_id)
+    pipe.hdel(cache.make_key(PENDING_VIEWS_KEY), property_id)
+    pipe.hdel(cache.make_key(FLUSHING_VIEWS_KEY), property_id)
+    pipe.execute()
+
+
+def get_most_viewed(limit=10):
+    """
+    Get the most viewed property ids from the ranking.
+
+    Returns:
+        list: (property_id, views) pairs, most viewed first
+    """
+    redis_client = get_redis_client()
+    if redis_client is None:
+        ranking = cache.get(VIEW_RANKING_KEY) or {}
+        return sorted(ranking.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    entries = redis_client.zrevrange(cache.make_key(VIEW_RANKING_KEY), 0, limit - 1, withscores=True)
+    return [(int(property_id), int(views)) for property_id, views in entries]
+
+
+def _flush_buffer_to_cache(counts):
+    """
+    Fallback for non-Redis caches: keep pending counts and the ranking as
+    dicts in the cache.
+    """
+    def add_counts(current):
+        merged = Counter(current)
+        merged.update(counts)
+        return dict(merged), None
+
+    update_cached_dict(PENDING_VIEWS_KEY, add_counts)
+    update_cached_dict(VIEW_RANKING_KEY, add_counts)
+
+
+def _flush_cache_counts_to_db(batch_size):
+    pending = cache.get(PENDING_VIEWS_KEY) or {}
+    cache.delete(PENDING_VIEWS_KEY)
+    items = list(pending.items())
+    applied = 0
+    for start in range(0, len(items), batch_size):
+        applied += _apply_view_counts(dict(items[start:start + batch_size]))
+    return applied
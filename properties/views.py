@@ -1,65 +1,170 @@
+from decimal import Decimal, InvalidOperation
 from django.shortcuts import render
+from django.utils import timezone
 from django.http import JsonResponse
-from django.views.decorators.cache import cache_page
 from django.core import serializers
 from .models import Property
-from .utils import get_all_properties, get_cache_status, get_redis_cache_metrics
+from .utils import CATALOG_TAG, get_all_properties, get_cache_status, get_property_detail
+from .adaptive_ttl import adaptive_cache_page
+from .compression import negotiate_encoding, precompressed_json_response
+from .metrics_sampler import get_sampled_app_stats, get_sampled_cache_metrics
+from .middleware import profile_section
+from .snapshot import SORT_FIELDS, get_property_snapshot
+from .conf import get_app_settings
+from .view_counters import DEFAULT_PROPERTIES_VIEW_COUNTERS, get_most_viewed, record_views
 
 
-@cache_page(60 * 15)  # Cache for 15 minutes
+@negotiate_encoding
+@adaptive_cache_page('property_list_page', tags=[CATALOG_TAG])
 def property_list(request):
     """
-    View to return all properties with caching enabled for 15 minutes.
+    View to return all properties with page caching enabled.
+    The page TTL adapts to observed read/write rates and cached pages are
+    invalidated with the catalog. The body is served precompressed per
+    catalog version, and the page cache keeps one copy per encoding.
     Uses low-level cache API for queryset caching.
     """
-    # Use the utility function that implements low-level caching
-    properties = get_all_properties()
-    
-    # Convert queryset to JSON-serializable format
-    properties_data = []
-    for property_obj in properties:
-        properties_data.append({
-            'id': property_obj.id,
-            'title': property_obj.title,
-            'description': property_obj.description,
-            'price': str(property_obj.price),  # Convert Decimal to string for JSON
-            'location': property_obj.location,
-            'created_at': property_obj.created_at.isoformat(),
-        })
-    
-    return JsonResponse({
-        'properties': properties_data,
-        'count': len(properties_data),
+    return precompressed_json_response(request, 'property_list', lambda: build_property_list_data({
         'cached': True,  # Indicator that this response might be cached
-    })
+    }))
 
 
 def property_list_no_page_cache(request):
     """
     View to return all properties without page-level caching.
-    This view demonstrates only the low-level queryset caching.
+    This view demonstrates low-level queryset caching plus the
+    precompressed body cache.
+    """
+    return precompressed_json_response(request, 'property_list_no_page_cache', lambda: build_property_list_data({
+        'queryset_cached': True,  # Indicator that queryset is cached
+        'page_cached': False,     # No page-level caching
+    }))
+
+
+def build_property_list_data(flags):
+    """
+    Build the JSON-serializable listing of all properties.
+    Only called when the precompressed body for the current catalog
+    version is not cached yet.
     """
     # Use the utility function that implements low-level caching
     properties = get_all_properties()
     
-    # Convert queryset to JSON-serializable format
-    properties_data = []
-    for property_obj in properties:
-        properties_data.append({
-            'id': property_obj.id,
-            'title': property_obj.title,
-            'description': property_obj.description,
-            'price': str(property_obj.price),  # Convert Decimal to string for JSON
-            'location': property_obj.location,
-            'created_at': property_obj.created_at.isoformat(),
-        })
+    with profile_section('serialize'):
+        # Convert queryset to JSON-serializable format
+        properties_data = []
+        for property_obj in properties:
+            properties_data.append({
+                'id': property_obj.id,
+                'title': property_obj.title,
+                'description': property_obj.description,
+                'price': str(property_obj.price),  # Convert Decimal to string for JSON
+                'location': property_obj.location,
+                'created_at': property_obj.created_at.isoformat(),
+            })
     
-    return JsonResponse({
+    return {
         'properties': properties_data,
         'count': len(properties_data),
-        'queryset_cached': True,  # Indicator that queryset is cached
-        'page_cached': False,     # No page-level caching
-    })
+        **flags,
+    }
+
+
+def property_search(request):
+    """
+    View to filter, sort and page properties using the in-memory snapshot.
+    Supports location, min_price, max_price, sort (prefix with '-' for
+    descending) and limit (at most 1000) query parameters. The top results
+    count as views.
+    """
+    params = request.GET
+    sort = params.get('sort', 'id')
+    descending = sort.startswith('-')
+    sort = sort.lstrip('-')
+    if sort not in SORT_FIELDS:
+        return JsonResponse({'error': f"Unsupported sort field: {sort}"}, status=400)
+
+    try:
+        min_price = Decimal(params['min_price']) if 'min_price' in params else None
+        max_price = Decimal(params['max_price']) if 'max_price' in params else None
+        limit = int(params.get('limit', 50))
+    except (InvalidOperation, ValueError):
+        return JsonResponse({'error': 'Invalid price or limit parameter'}, status=400)
+    if any(price is not None and not price.is_finite() for price in (min_price, max_price)):
+        # Decimal() accepts NaN and Infinity, which can't be compared in cents
+        return JsonResponse({'error': 'Invalid price or limit parameter'}, status=400)
+
+    snapshot = get_property_snapshot()
+    rows = snapshot.query(
+        location=params.get('location'),
+        min_price=min_price,
+        max_price=max_price,
+        sort=sort,
+        descending=descending,
+        limit=min(max(limit, 0), 1000),
+    )
+
+    counted = get_app_settings(
+        'PROPERTIES_VIEW_COUNTERS', DEFAULT_PROPERTIES_VIEW_COUNTERS
+    )['SEARCH_RESULTS_COUNTED']
+    record_views(snapshot.ids[rows[:counted]].tolist())
+
+    with profile_section('serialize'):
+        return JsonResponse({
+            'properties': snapshot.rows(rows),
+            'count': len(rows),
+            'catalog_generation': snapshot.generation,
+        })
+
+
+def property_detail(request, property_id):
+    """
+    View to return a single property, cached per property.
+    Each request counts as a view of the property.
+    """
+    property_data = get_property_detail(property_id)
+    if property_data is None:
+        return JsonResponse({'error': 'Property not found'}, status=404)
+    
+    record_views([property_id])
+    
+    with profile_section('serialize'):
+        return JsonResponse({'property': property_data})
+
+
+def most_viewed(request):
+    """
+    View to return the most viewed properties, ranked by the Redis-side
+    view counters.
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 100)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit parameter'}, status=400)
+    
+    ranking = get_most_viewed(limit)
+    properties = Property.objects.only('id', 'title', 'price', 'location').in_bulk(
+        [property_id for property_id, _ in ranking]
+    )
+    
+    with profile_section('serialize'):
+        results = []
+        for property_id, views in ranking:
+            property_obj = properties.get(property_id)
+            if property_obj is None:
+                continue  # Deleted since it was ranked
+            results.append({
+                'id': property_obj.id,
+                'title': property_obj.title,
+                'price': str(property_obj.price),
+                'location': property_obj.location,
+                'views': views,
+            })
+        
+        return JsonResponse({
+            'properties': results,
+            'count': len(results),
+        })
 
 
 def cache_status(request):
@@ -79,14 +184,20 @@ def cache_status(request):
 def cache_metrics(request):
     """
     View to display Redis cache metrics including hit/miss ratios.
+    Redis metrics and application cache statistics come from the background
+    sampler, so this view only reads memory (and the session, for the staff
+    check); they are at most one sample interval old.
+    Restricted to staff, since it reports on the shared cache's keys.
     """
-    metrics = get_redis_cache_metrics()
-    cache_status = get_cache_status()
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Staff access required'}, status=403)
+    
+    metrics = get_sampled_cache_metrics()
     
     return JsonResponse({
         'redis_metrics': metrics,
-        'application_cache_status': cache_status,
-        'timestamp': '2025-08-31T10:00:00Z',  # You might want to add actual timestamp
+        **get_sampled_app_stats(),
+        'timestamp': timezone.now().isoformat(),
         'recommendations': {
             'efficiency': metrics.get('cache_efficiency', 'Unknown'),
             'suggestion': get_cache_recommendation(metrics.get('hit_ratio_percentage', 0))